@@ -7,7 +7,8 @@ from alembic import context
 
 from kbalyzer.db.postgres import Base
 from kbalyzer.db.schemas.user import UserSchema
-from kbalyzer.db.schemas.brews import Brew
+from kbalyzer.db.schemas.brews import Brew, BrewReading, BrewRollup
+from kbalyzer.db.schemas.token import RevokedToken
 from kbalyzer.settings import settings
 
 # this is the Alembic Config object, which provides
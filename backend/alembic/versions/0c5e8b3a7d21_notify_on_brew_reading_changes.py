@@ -0,0 +1,43 @@
+"""notify on brew reading changes
+
+Revision ID: 0c5e8b3a7d21
+Revises: f2c7a9d4e6b1
+Create Date: 2026-10-16 23:41:07.518930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5e8b3a7d21'
+down_revision: Union[str, Sequence[str], None] = 'f2c7a9d4e6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The rollup row of a brew is written whenever readings are added, so it carries the brew id
+    # for caches keyed by brew without a row level trigger on the much larger readings table.
+    op.execute("""
+    CREATE FUNCTION notify_brew_readings_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('brew_readings_changed', COALESCE(NEW.brew_id, OLD.brew_id)::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER brew_readings_changed
+    AFTER INSERT OR UPDATE OR DELETE ON brew_rollup
+    FOR EACH ROW EXECUTE FUNCTION notify_brew_readings_changed()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER brew_readings_changed ON brew_rollup")
+    op.execute("DROP FUNCTION notify_brew_readings_changed()")
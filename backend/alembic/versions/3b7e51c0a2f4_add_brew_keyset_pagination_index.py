@@ -0,0 +1,29 @@
+"""add brew keyset pagination index
+
+Revision ID: 3b7e51c0a2f4
+Revises: 8864d83430db
+Create Date: 2026-10-16 12:04:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e51c0a2f4'
+down_revision: Union[str, Sequence[str], None] = '8864d83430db'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Users are paged by email, which is already covered by the unique constraint index.
+    op.create_index('ix_brew_creation_date_id', 'brew', ['creation_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_brew_creation_date_id', table_name='brew')
@@ -0,0 +1,34 @@
+"""stop notifying brew changes on rollups
+
+Revision ID: 4b9e2d7c1a05
+Revises: 6f1d4a9c2b83
+Create Date: 2026-10-18 10:02:37.418263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2d7c1a05'
+down_revision: Union[str, Sequence[str], None] = '6f1d4a9c2b83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Cached brew listings no longer hold rollups, which are cached per brew and dropped on the
+    # brew readings notification instead, so ingesting readings does not clear every listing.
+    op.execute("DROP TRIGGER brew_rollup_changed ON brew_rollup")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+    CREATE TRIGGER brew_rollup_changed
+    AFTER INSERT OR UPDATE OR DELETE ON brew_rollup
+    FOR EACH ROW EXECUTE FUNCTION notify_brew_changed()
+    """)
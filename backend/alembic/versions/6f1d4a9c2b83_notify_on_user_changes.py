@@ -0,0 +1,43 @@
+"""notify on user changes
+
+Revision ID: 6f1d4a9c2b83
+Revises: 0c5e8b3a7d21
+Create Date: 2026-10-17 09:14:52.731046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6f1d4a9c2b83'
+down_revision: Union[str, Sequence[str], None] = '0c5e8b3a7d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Principals are cached by email and token versions by id, so both are sent. The old values
+    # are the ones caches hold.
+    op.execute("""
+    CREATE FUNCTION notify_user_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('user_changed', json_build_object('id', OLD.id, 'email', OLD.email)::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER user_changed
+    AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_user_changed()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER user_changed ON users")
+    op.execute("DROP FUNCTION notify_user_changed()")
@@ -0,0 +1,41 @@
+"""notify on brew changes
+
+Revision ID: 9a4e1f7b2c58
+Revises: e7b03c4d91fa
+Create Date: 2026-10-16 17:38:55.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e1f7b2c58'
+down_revision: Union[str, Sequence[str], None] = 'e7b03c4d91fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+    CREATE FUNCTION notify_brew_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('brew_changed', TG_OP);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+    CREATE TRIGGER brew_changed
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON brew
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_brew_changed()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER brew_changed ON brew")
+    op.execute("DROP FUNCTION notify_brew_changed()")
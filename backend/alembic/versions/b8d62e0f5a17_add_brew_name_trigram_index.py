@@ -0,0 +1,37 @@
+"""add brew name trigram index
+
+Revision ID: b8d62e0f5a17
+Revises: 9a4e1f7b2c58
+Create Date: 2026-10-16 18:51:17.662043
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d62e0f5a17'
+down_revision: Union[str, Sequence[str], None] = '9a4e1f7b2c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_brew_name_trgm',
+        'brew',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The extension is left installed, other objects may depend on it
+    op.drop_index('ix_brew_name_trgm', table_name='brew', postgresql_using='gin')
@@ -0,0 +1,16 @@
+"""Benchmarks of the API, run in process against a disposable database.
+
+Run them from the backend directory, e.g. ``python -m benchmarks.auth_latency --help``. The app
+runs with its lifespan against the database configured through the usual settings, which must
+have all migrations applied. Benchmarks create and delete their own rows. Login rate limits are
+lifted unless set explicitly, so they do not throttle the load the benchmarks generate.
+"""
+import os
+
+for _name in (
+    "LOGIN_RATE_LIMIT_IP_PER_MINUTE",
+    "LOGIN_RATE_LIMIT_IP_BURST",
+    "LOGIN_RATE_LIMIT_ACCOUNT_PER_MINUTE",
+    "LOGIN_RATE_LIMIT_ACCOUNT_BURST",
+):
+    os.environ.setdefault(_name, "1000000")
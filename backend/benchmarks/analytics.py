@@ -0,0 +1,123 @@
+"""Benchmark brew analytics over many brews with many readings each.
+
+Brews and their readings are generated inside Postgres, then `/api/brews/analytics` is timed cold,
+with the memoized analytics dropped before every request, and warm. The analysis alone is timed on
+the same number of synthetic readings, and the peak resident memory of the process is reported.
+"""
+import argparse
+import asyncio
+import resource
+from time import perf_counter
+
+import numpy as np
+from sqlalchemy import delete, text
+
+from benchmarks.common import api_client, login, running_app, summarize
+from kbalyzer.db.crud.analytics import analyze_readings, brew_analytics_cache, concatenate_readings
+from kbalyzer.db.postgres import AsyncSessionLocal
+from kbalyzer.db.schemas.brews import Brew
+from kbalyzer.settings import settings
+
+NAME_PREFIX = "benchmark-analytics "
+READING_INTERVAL_SECONDS = 60
+
+
+async def _add_brews(brews: int, readings: int) -> None:
+    """Add brews with readings every minute, pH and gravity falling over time and some values missing."""
+    parameters = {"prefix": NAME_PREFIX, "brews": brews, "readings": readings}
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text("INSERT INTO brew (id, name, creation_date) SELECT gen_random_uuid(), :prefix || i, now() "
+                 "FROM generate_series(1, :brews) AS i"),
+            parameters,
+        )
+        await db.execute(
+            text(
+                "INSERT INTO brew_reading (brew_id, recorded_at, temperature, ph, gravity) "
+                "SELECT brew.id, timestamptz '2026-01-01' + make_interval(secs => i * :interval), "
+                "20 + random() * 5, "
+                "CASE WHEN random() < 0.1 THEN NULL ELSE 4.0 - 1.3 * i / :readings + random() * 0.1 END, "
+                "CASE WHEN random() < 0.1 THEN NULL ELSE 1.050 - 0.045 * i / :readings + random() * 0.001 END "
+                "FROM brew CROSS JOIN generate_series(0, :readings - 1) AS i WHERE brew.name LIKE :prefix || '%'",
+            ),
+            {**parameters, "interval": READING_INTERVAL_SECONDS},
+        )
+        await db.execute(text(
+            "INSERT INTO brew_rollup (brew_id, reading_count, first_recorded_at, last_recorded_at) "
+            "SELECT brew_id, count(*), min(recorded_at), max(recorded_at) FROM brew_reading "
+            "JOIN brew ON brew.id = brew_reading.brew_id WHERE brew.name LIKE :prefix || '%' GROUP BY brew_id",
+        ), parameters)
+        await db.commit()
+        await db.execute(text("ANALYZE brew_reading"))
+
+
+def _time_analysis(brews: int, readings: int, rounds: int) -> tuple[list[float], list[float]]:
+    """Time concatenating per brew reading lists, as the driver returns them, and analyzing them."""
+    rng = np.random.default_rng(0)
+    times = (np.arange(readings) * READING_INTERVAL_SECONDS).tolist()
+    columns = [
+        (times, rng.uniform(2.7, 4.0, readings).tolist(), rng.uniform(1.005, 1.050, readings).tolist())
+        for _ in range(brews)
+    ]
+    concatenate_samples, analyze_samples = [], []
+    for _ in range(rounds):
+        start = perf_counter()
+        lengths, concatenated = concatenate_readings(columns)
+        concatenate_samples.append(perf_counter() - start)
+
+        start = perf_counter()
+        analyze_readings(
+            lengths, concatenated, settings.BREW_ANALYTICS_TARGET_PH, settings.BREW_ANALYTICS_CURVE_POINTS,
+        )
+        analyze_samples.append(perf_counter() - start)
+    return concatenate_samples, analyze_samples
+
+
+def _peak_rss_mb() -> float:
+    """Get the peak resident memory of the process so far in MiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(brews: int, readings: int, rounds: int) -> None:
+    """Run the benchmark."""
+    async with running_app(), api_client() as client:
+        (await login(client)).raise_for_status()
+        try:
+            await _add_brews(brews, readings)
+            label = f"{brews:,} brews x {readings:,} readings"
+            print(f"peak rss before requests: {_peak_rss_mb():.0f}MiB")
+
+            cold = []
+            for _ in range(rounds):
+                brew_analytics_cache.clear()
+                start = perf_counter()
+                (await client.get("/api/brews/analytics")).raise_for_status()
+                cold.append(perf_counter() - start)
+            print(summarize(f"cold analytics of {label}", cold))
+            print(f"peak rss after cold requests: {_peak_rss_mb():.0f}MiB")
+
+            warm = []
+            for _ in range(rounds):
+                start = perf_counter()
+                (await client.get("/api/brews/analytics")).raise_for_status()
+                warm.append(perf_counter() - start)
+            print(summarize(f"warm analytics of {label}", warm))
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Brew).where(Brew.name.startswith(NAME_PREFIX)))
+                await db.commit()
+            brew_analytics_cache.clear()
+
+    concatenate, analyze = _time_analysis(brews, readings, rounds)
+    print(summarize(f"concatenate_readings of {label}", concatenate))
+    print(summarize(f"analyze_readings of {label}", analyze))
+    print(f"peak rss: {_peak_rss_mb():.0f}MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--brews", type=int, default=1_000, help="Number of brews to analyze.")
+    parser.add_argument("--readings", type=int, default=10_000, help="Number of readings of every brew.")
+    parser.add_argument("--rounds", type=int, default=5, help="Number of times every measurement is repeated.")
+    args = parser.parse_args()
+    asyncio.run(main(args.brews, args.readings, args.rounds))
@@ -0,0 +1,79 @@
+"""Benchmark /api/auth/me latency while a burst of logins hashes passwords.
+
+Password checks run on the password worker pool, so authenticated requests should keep their
+latency while logins are in flight. The p99 of /api/auth/me is reported idle and during the burst.
+"""
+import argparse
+import asyncio
+from time import perf_counter
+
+import httpx
+from sqlalchemy import delete
+
+from benchmarks.common import api_client, login, running_app, summarize
+from kbalyzer.db.postgres import AsyncSessionLocal
+from kbalyzer.db.schemas.user import UserSchema
+from kbalyzer.models.user import MAX_USERS_PER_BATCH
+
+EMAIL_PREFIX = "benchmark-auth-"
+PASSWORD = "benchmark-password"  # noqa: S105
+
+
+async def _time_me(client: httpx.AsyncClient) -> float:
+    start = perf_counter()
+    (await client.get("/api/auth/me")).raise_for_status()
+    return perf_counter() - start
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    """Request /api/auth/me back to back until stopped."""
+    samples = []
+    while not stop.is_set():
+        samples.append(await _time_me(client))
+    return samples
+
+
+async def _login_as(email: str) -> int:
+    async with api_client() as client:
+        return (await login(client, email, PASSWORD)).status_code
+
+
+async def main(logins: int, idle_requests: int) -> None:
+    """Run the benchmark."""
+    emails = [f"{EMAIL_PREFIX}{i}@example.com" for i in range(logins)]
+    async with running_app(), api_client() as admin:
+        (await login(admin)).raise_for_status()
+        try:
+            for i in range(0, logins, MAX_USERS_PER_BATCH):
+                (await admin.post("/api/admin/user/bulk", json={"users": [
+                    {"email": email, "password": PASSWORD} for email in emails[i:i + MAX_USERS_PER_BATCH]
+                ]})).raise_for_status()
+
+            idle = [await _time_me(admin) for _ in range(idle_requests)]
+
+            stop = asyncio.Event()
+            probe = asyncio.create_task(_probe(admin, stop))
+            start = perf_counter()
+            statuses = await asyncio.gather(*(_login_as(email) for email in emails))
+            burst_seconds = perf_counter() - start
+            stop.set()
+            busy = await probe
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(UserSchema).where(UserSchema.email.startswith(EMAIL_PREFIX)))
+                await db.commit()
+
+    print(summarize("/api/auth/me idle", idle))
+    print(summarize("/api/auth/me during logins", busy))
+    print(
+        f"{logins} concurrent logins in {burst_seconds:.2f}s, "
+        f"{statuses.count(200)} succeeded, {logins - statuses.count(200)} rejected",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=100, help="Number of concurrent logins in the burst.")
+    parser.add_argument("--idle-requests", type=int, default=200, help="Number of requests measured before it.")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.idle_requests))
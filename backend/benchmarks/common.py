@@ -0,0 +1,43 @@
+"""Helpers shared by the benchmarks."""
+import statistics
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+
+import httpx
+
+from kbalyzer.lifespan import lifespan
+from kbalyzer.main import app
+from kbalyzer.settings import settings
+
+
+@asynccontextmanager
+async def running_app() -> AsyncIterator[None]:
+    """Run the app lifespan, creating the first superuser and starting background tasks."""
+    async with lifespan(app):
+        yield
+
+
+def api_client() -> httpx.AsyncClient:
+    """Get a client sending requests straight to the app."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=300)
+
+
+async def login(
+    client: httpx.AsyncClient,
+    email: str = settings.FIRST_SUPERUSER_EMAIL,
+    password: str = settings.FIRST_SUPERUSER_PASSWORD,
+) -> httpx.Response:
+    """Log a client in, keeping the access token cookie for its following requests."""
+    return await client.post("/api/auth/token", data={"username": email, "password": password})
+
+
+def summarize(name: str, seconds: Sequence[float]) -> str:
+    """Format the count and p50, p99 and max of latency samples in milliseconds."""
+    if len(seconds) < 2:  # noqa: PLR2004
+        return f"{name}: {len(seconds)} samples, not enough for percentiles"
+
+    percentiles = statistics.quantiles(seconds, n=100, method="inclusive")
+    return (
+        f"{name}: n={len(seconds)} p50={percentiles[49] * 1000:.2f}ms "
+        f"p99={percentiles[98] * 1000:.2f}ms max={max(seconds) * 1000:.2f}ms"
+    )
@@ -0,0 +1,86 @@
+"""Benchmark bulk ingest of brew readings in rows per second.
+
+Each brew gets its own stream of batches posted to /api/brews/{brew_id}/readings, with the streams
+running concurrently. Request bodies are built before timing starts.
+"""
+import argparse
+import asyncio
+import random
+from datetime import UTC, datetime, timedelta
+from time import perf_counter
+
+import httpx
+import orjson
+from sqlalchemy import delete
+
+from benchmarks.common import api_client, login, running_app, summarize
+from kbalyzer.db.postgres import AsyncSessionLocal
+from kbalyzer.db.schemas.brews import Brew
+
+NAME_PREFIX = "benchmark-ingest-"
+
+
+def _batches(count: int, size: int) -> list[bytes]:
+    """Build request bodies of consecutive readings, one every ten seconds."""
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    bodies = []
+    for batch in range(count):
+        readings = [
+            {
+                "recorded_at": (start + timedelta(seconds=10 * (batch * size + i))).isoformat(),
+                "temperature": round(random.uniform(20, 26), 2),  # noqa: S311
+                "ph": round(random.uniform(2.5, 4.5), 2),  # noqa: S311
+                "gravity": round(random.uniform(1.0, 1.06), 4),  # noqa: S311
+            }
+            for i in range(size)
+        ]
+        bodies.append(orjson.dumps({"readings": readings}))
+    return bodies
+
+
+async def _ingest(client: httpx.AsyncClient, brew: Brew, bodies: list[bytes]) -> tuple[int, list[float]]:
+    """Post batches of one brew one after another."""
+    inserted = 0
+    latencies = []
+    for body in bodies:
+        start = perf_counter()
+        response = await client.post(
+            f"/api/brews/{brew.id}/readings", content=body, headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        latencies.append(perf_counter() - start)
+        inserted += response.json()["inserted"]
+    return inserted, latencies
+
+
+async def main(brews: int, batches: int, batch_size: int) -> None:
+    """Run the benchmark."""
+    bodies = _batches(batches, batch_size)
+    async with running_app(), api_client() as client:
+        (await login(client)).raise_for_status()
+        async with AsyncSessionLocal() as db:
+            created = [Brew(name=f"{NAME_PREFIX}{i}") for i in range(brews)]
+            db.add_all(created)
+            await db.commit()
+
+        try:
+            start = perf_counter()
+            results = await asyncio.gather(*(_ingest(client, brew, bodies) for brew in created))
+            elapsed = perf_counter() - start
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Brew).where(Brew.name.startswith(NAME_PREFIX)))
+                await db.commit()
+
+    inserted = sum(count for count, _ in results)
+    print(summarize(f"POST readings, {batch_size} per batch", [s for _, latencies in results for s in latencies]))
+    print(f"{inserted} readings in {elapsed:.2f}s over {brews} concurrent brews: {inserted / elapsed:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--brews", type=int, default=4, help="Number of brews ingesting concurrently.")
+    parser.add_argument("--batches", type=int, default=10, help="Number of batches posted per brew.")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Number of readings per batch.")
+    args = parser.parse_args()
+    asyncio.run(main(args.brews, args.batches, args.batch_size))
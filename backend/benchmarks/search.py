@@ -0,0 +1,79 @@
+"""Benchmark brew search latency as the number of brews grows.
+
+Brews are added in steps up to each size and the same partial and misspelled queries are timed at
+every step. With the trigram index the latency should stay flat instead of growing with the table.
+"""
+import argparse
+import asyncio
+import random
+from itertools import product
+from time import perf_counter
+
+import httpx
+from sqlalchemy import delete, insert, text
+
+from benchmarks.common import api_client, login, running_app, summarize
+from kbalyzer.db.postgres import AsyncSessionLocal
+from kbalyzer.db.schemas.brews import Brew
+
+NAME_PREFIX = "benchmark-search "
+FLAVORS = (
+    "ginger", "hibiscus", "lemon", "blueberry", "mint", "mango", "peach", "lavender", "raspberry",
+    "pineapple", "cherry", "turmeric", "jasmine", "elderflower", "strawberry", "basil", "apple", "pear",
+)
+STYLES = ("green tea", "black tea", "oolong", "jun", "rooibos", "white tea", "sencha", "earl grey")
+QUERIES = ("ginger", "hibiscus lemon", "gnger", "lavendar", "rasberry", "earl", "jun mint", "straw")
+INSERT_BATCH_SIZE = 10_000
+
+
+def _names(start: int, stop: int) -> list[str]:
+    """Get unique brew names, mixing flavors and styles like real brew names do."""
+    combinations = list(product(FLAVORS, FLAVORS, STYLES))
+    return [f"{NAME_PREFIX}{' '.join(combinations[i % len(combinations)])} {i}" for i in range(start, stop)]
+
+
+async def _add_brews(start: int, stop: int) -> None:
+    async with AsyncSessionLocal() as db:
+        for offset in range(start, stop, INSERT_BATCH_SIZE):
+            names = _names(offset, min(offset + INSERT_BATCH_SIZE, stop))
+            await db.execute(insert(Brew), [{"name": name} for name in names])
+        await db.commit()
+        await db.execute(text("ANALYZE brew"))
+
+
+async def _time_queries(client: httpx.AsyncClient, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        for query in random.sample(QUERIES, len(QUERIES)):
+            start = perf_counter()
+            (await client.get("/api/brews/search", params={"q": query})).raise_for_status()
+            samples.append(perf_counter() - start)
+    return samples
+
+
+async def main(sizes: list[int], rounds: int) -> None:
+    """Run the benchmark."""
+    async with running_app(), api_client() as client:
+        (await login(client)).raise_for_status()
+        try:
+            seeded = 0
+            for size in sorted(sizes):
+                await _add_brews(seeded, size)
+                seeded = size
+                await _time_queries(client, 1)  # Warm up caches after the inserts
+                print(summarize(f"search over {size:,} brews", await _time_queries(client, rounds)))
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Brew).where(Brew.name.startswith(NAME_PREFIX)))
+                await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=lambda value: [int(size) for size in value.split(",")], default=[1_000, 10_000, 100_000],
+        help="Comma separated brew counts to measure at.",
+    )
+    parser.add_argument("--rounds", type=int, default=25, help="Number of times every query is timed per size.")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.rounds))
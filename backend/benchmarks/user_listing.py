@@ -0,0 +1,84 @@
+"""Microbenchmark of /api/admin/user/all returning a page of 1,000 users.
+
+Reports the latency of the endpoint and, separately, the time spent rendering the page: once as
+the route does, from the validated model, and once through FastAPI's default JSON response.
+"""
+import argparse
+import asyncio
+from time import perf_counter
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+
+from benchmarks.common import api_client, login, running_app, summarize
+from kbalyzer.db.postgres import AsyncSessionLocal
+from kbalyzer.db.schemas.user import UserSchema
+from kbalyzer.models.user import UserAdminView, UserAllResponse
+from kbalyzer.responses import ORJSONResponse
+
+EMAIL_PREFIX = "benchmark-listing-"
+
+
+def _time_rendering(users: list[UserSchema], repeat: int) -> tuple[list[float], list[float]]:
+    """Time rendering a page of users with the orjson response and with the default JSON response."""
+    orjson_samples, default_samples = [], []
+    for _ in range(repeat):
+        start = perf_counter()
+        ORJSONResponse(UserAllResponse(
+            users=[UserAdminView.model_validate(user) for user in users], total=len(users),
+        ))
+        orjson_samples.append(perf_counter() - start)
+
+        start = perf_counter()
+        JSONResponse(jsonable_encoder(UserAllResponse(
+            users=[UserAdminView.model_validate(user) for user in users], total=len(users),
+        )))
+        default_samples.append(perf_counter() - start)
+    return orjson_samples, default_samples
+
+
+async def main(rows: int, requests: int) -> None:
+    """Run the benchmark."""
+    async with running_app(), api_client() as client:
+        (await login(client)).raise_for_status()
+        async with AsyncSessionLocal() as db:
+            # Listing never checks passwords, so skip hashing them.
+            db.add_all(
+                UserSchema(email=f"{EMAIL_PREFIX}{i:05}@example.com", hashed_password="benchmark")  # noqa: S106
+                for i in range(rows)
+            )
+            await db.commit()
+
+        try:
+            latencies = []
+            size = 0
+            for _ in range(requests):
+                start = perf_counter()
+                response = await client.get("/api/admin/user/all", params={"limit": rows})
+                response.raise_for_status()
+                latencies.append(perf_counter() - start)
+                size = len(response.content)
+
+            async with AsyncSessionLocal() as db:
+                users = list((await db.scalars(
+                    select(UserSchema).where(UserSchema.email.startswith(EMAIL_PREFIX)),
+                )).all())
+            orjson_samples, default_samples = _time_rendering(users, requests)
+        finally:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(UserSchema).where(UserSchema.email.startswith(EMAIL_PREFIX)))
+                await db.commit()
+
+    print(summarize(f"GET /api/admin/user/all?limit={rows}", latencies))
+    print(f"response size {size:,} bytes")
+    print(summarize(f"render {len(users)} users with ORJSONResponse", orjson_samples))
+    print(summarize(f"render {len(users)} users with JSONResponse", default_samples))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000, help="Number of users on the page.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of measured requests.")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.requests))
@@ -1,8 +1,15 @@
 """Kobuchalyzer authentication module."""
+import asyncio
+import heapq
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
+from time import time
 from typing import Any
+from uuid import uuid4
 
 import jwt
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 
@@ -13,13 +20,14 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=Fals
 
 
 def create_access_token(
-    subject: str | Any, expires_delta: timedelta | None = None, # noqa: ANN401
+    subject: str | Any, expires_delta: timedelta | None = None, claims: dict[str, Any] | None = None, # noqa: ANN401
 ) -> str:
     """Create an access token.
 
     Args:
         subject (Union[str, Any]): The subject for which the access token is created.
         expires_delta (timedelta, optional): The expiration time for the access token. Defaults to None.
+        claims (dict[str, Any], optional): Additional claims to encode in the token. Defaults to None.
 
     Returns:
         str: The encoded access token.
@@ -31,12 +39,52 @@ def create_access_token(
         expire = datetime.now(tz=UTC) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "jti": uuid4().hex}
     return jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM,
     )
 
 
+class RevocationIndex:
+    """Per worker set of revoked token ids.
+
+    Ids are dropped once the token they belong to expires, as an expired token is rejected
+    anyway, so the index only ever holds tokens that are both revoked and still live.
+    """
+
+    def __init__(self) -> None:
+        """Initialize class."""
+        self.watermark: datetime | None = None
+        self._expires_at: dict[str, float] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        """Get number of revoked token ids held."""
+        return len(self._expires_at)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """Mark a token id as revoked until the token expires."""
+        if jti in self._expires_at:
+            return
+        timestamp = expires_at.timestamp()
+        self._expires_at[jti] = timestamp
+        heapq.heappush(self._expiry_heap, (timestamp, jti))
+
+    def is_revoked(self, jti: str) -> bool:
+        """Check whether a token id is revoked."""
+        return jti in self._expires_at
+
+    def evict_expired(self) -> None:
+        """Drop the ids of tokens that have expired."""
+        now = time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry_heap)
+            del self._expires_at[jti]
+
+
+revocation_index = RevocationIndex()
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify if a plain password matches a hashed password.
 
@@ -62,3 +110,105 @@ def get_password_hash(password: str) -> str:
 
     """
     return pwd_context.hash(password)
+
+
+class PasswordWorkerPool:
+    """Bounded thread pool for password hashing work.
+
+    bcrypt releases the GIL while hashing, so running it on worker threads keeps the event loop
+    free to serve other requests. Once ``max_pending`` jobs are queued or running, new jobs are
+    rejected with a 503 instead of queueing up behind a burst of logins.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        """Initialize class."""
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run[T](self, func: Callable[..., T], *args: Any) -> T:  # noqa: ANN401
+        """Run a function on the pool.
+
+        Raises:
+            HTTPException: 503 if the pool is saturated.
+
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests",
+                headers={"Retry-After": "1"},
+            )
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password")
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def map[T, A](self, func: Callable[[A], T], items: Sequence[A]) -> list[T]:
+        """Run a function over many inputs on the pool, in parallel.
+
+        At most ``max_workers`` of the jobs are handed to the pool at once, which is enough to keep
+        every worker busy while leaving the remaining pending slots to logins. If a job fails, the
+        jobs not handed to the pool yet are cancelled rather than run for a call that has failed.
+
+        Raises:
+            HTTPException: 503 if the pool is saturated.
+
+        """
+        limit = asyncio.Semaphore(self.max_workers)
+
+        async def run_limited(item: A) -> T:
+            async with limit:
+                return await self.run(func, item)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(run_limited(item)) for item in items]
+        except ExceptionGroup as errors:
+            raise errors.exceptions[0] from None
+        return [task.result() for task in tasks]
+
+    def shutdown(self) -> None:
+        """Shut down the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordWorkerPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool without blocking the event loop.
+
+    Args:
+        plain_password (str): The plain password to be verified.
+        hashed_password (str): The hashed password to compare with.
+
+    Returns:
+        bool: True if the plain password matches the hashed password, False otherwise.
+
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password worker pool without blocking the event loop.
+
+    Args:
+        password (str): The password to be hashed.
+
+    Returns:
+        str: The hash value of the password.
+
+    """
+    return await password_pool.run(get_password_hash, password)
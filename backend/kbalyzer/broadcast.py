@@ -0,0 +1,127 @@
+"""In-process fan-out of live events to subscribers."""
+import asyncio
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any, Protocol
+
+import orjson
+
+from kbalyzer.db.notify import BROADCAST_CHANNEL, NotifyRelay, change_listener
+from kbalyzer.db.postgres import engine
+from kbalyzer.logging import get_logger
+from kbalyzer.settings import settings
+
+logger = get_logger(__name__)
+
+
+class BroadcastRelay(Protocol):
+    """Transport carrying published messages to every worker.
+
+    A relay must hand each message it is given to ``Broadcaster.deliver`` on every worker,
+    including the one that published it.
+    """
+
+    async def publish(self, message: str) -> None:
+        """Send a message to all workers."""
+        ...
+
+
+class Subscription:
+    """Stream of messages for a set of topics, buffered up to a fixed size.
+
+    A subscriber that lets its buffer fill up is dropped: its stream ends and ``dropped`` is set,
+    so one slow client cannot hold back delivery to the others or grow memory without bound.
+    """
+
+    def __init__(self, topics: Iterable[str], max_buffer: int) -> None:
+        """Initialize class."""
+        self.topics = frozenset(topics)
+        self.dropped = False
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_buffer)
+
+    def __aiter__(self) -> "Subscription":
+        """Iterate over messages until the subscription is dropped."""
+        return self
+
+    async def __anext__(self) -> str:
+        """Wait for the next message."""
+        if self.dropped:
+            raise StopAsyncIteration
+        return await self.queue.get()
+
+
+class Broadcaster:
+    """Fan out each published event to every subscriber of its topic.
+
+    Events are serialized once and the same message is queued for every subscriber. Without a
+    relay, events only reach subscribers connected to this worker.
+    """
+
+    def __init__(self, max_buffer: int, relay: BroadcastRelay | None = None) -> None:
+        """Initialize class.
+
+        Args:
+            max_buffer (int): Number of messages a subscriber may fall behind before it is dropped.
+            relay (BroadcastRelay | None): Transport to other workers. Defaults to None.
+
+        """
+        self.max_buffer = max_buffer
+        self.relay = relay
+        self._subscribers: defaultdict[str, set[Subscription]] = defaultdict(set)
+
+    @contextmanager
+    def subscribe(self, topics: Iterable[str]) -> Iterator[Subscription]:
+        """Subscribe to topics for the duration of the context."""
+        subscription = Subscription(topics, self.max_buffer)
+        for topic in subscription.topics:
+            self._subscribers[topic].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._unsubscribe(subscription)
+
+    async def publish(self, topic: str, event: dict[str, Any]) -> None:
+        """Publish an event to the subscribers of a topic on every worker.
+
+        Live events are best effort, so a failing relay is logged rather than raised to the publisher.
+        """
+        message = orjson.dumps({"topic": topic, "event": event}).decode()
+        if self.relay is None:
+            self.deliver(message)
+            return
+
+        try:
+            await self.relay.publish(message)
+        except Exception:
+            logger.exception("Failed to relay event for %s", topic)
+
+    def deliver(self, message: str) -> None:
+        """Queue a published message for the subscribers of its topic on this worker."""
+        topic = orjson.loads(message)["topic"]
+        for subscription in list(self._subscribers.get(topic, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Dropping subscriber of %s that fell %d messages behind", topic, self.max_buffer)
+                subscription.dropped = True
+                self._unsubscribe(subscription)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+
+broadcaster = Broadcaster(max_buffer=settings.BROADCAST_SUBSCRIBER_BUFFER)
+if settings.BROADCAST_RELAY == "postgres":
+    broadcaster.relay = NotifyRelay(engine, BROADCAST_CHANNEL)
+
+    def _deliver_relayed(payload: str | None) -> None:
+        if payload is not None:
+            broadcaster.deliver(payload)
+
+    change_listener.subscribe(BROADCAST_CHANNEL, _deliver_relayed)
@@ -0,0 +1,90 @@
+"""In-process caching utilities."""
+from collections import OrderedDict
+from collections.abc import Hashable
+from time import monotonic
+
+
+class TTLCache[K: Hashable, V]:
+    """Bounded least-recently-used cache whose entries expire after a fixed time to live.
+
+    Entries are evicted when they are older than ``ttl`` seconds or when the cache grows
+    beyond ``max_size`` entries, in which case the least recently used entry is dropped.
+    The cache is local to the process and is not safe to share between threads.
+
+    ``generation`` is bumped whenever entries are removed, so a caller can compare it before and
+    after computing a value and skip caching a value that may already be stale.
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Initialize class.
+
+        Args:
+            max_size (int): Maximum number of entries kept in the cache.
+            ttl (float): Number of seconds an entry stays valid after it was set.
+
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Get number of entries currently held, including expired ones not yet evicted."""
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """Get a value from the cache.
+
+        Args:
+            key (K): The key to look up.
+
+        Returns:
+            V | None: The cached value, or None if missing or expired.
+
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """Set a value in the cache, evicting the least recently used entry when full.
+
+        Args:
+            key (K): The key to store the value under.
+            value (V): The value to store.
+
+        """
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """Remove a key from the cache if present."""
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Get cache hit, miss and size counters."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,312 @@
+"""Brew fermentation analytics.
+
+Readings of many brews are fetched in one query as per brew arrays and analyzed together with
+vectorized NumPy operations over the concatenated readings, so the cost per reading stays in C no
+matter how many brews are analyzed. Results are memoized per brew until new readings arrive.
+"""
+import asyncio
+from collections.abc import Sequence
+from math import isnan
+from typing import Annotated
+from uuid import UUID
+
+import numpy as np
+from fastapi import Depends
+from sqlalchemy import Float, Row, cast, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.notify import BREW_READINGS_CHANNEL, change_listener
+from kbalyzer.db.postgres import get_db, release_connection
+from kbalyzer.db.schemas.brews import BrewReading, BrewRollup
+from kbalyzer.models.brews import BrewAnalytics, BrewAnalyticsAverage, BrewAnalyticsComparison
+from kbalyzer.settings import settings
+
+ABV_FACTOR = 131.25
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+# Analytics keyed by brew id. Entries are dropped whenever readings of the brew change, on every
+# worker, through the brew readings notification.
+brew_analytics_cache: TTLCache[UUID, BrewAnalytics] = TTLCache(
+    max_size=settings.BREW_ANALYTICS_CACHE_MAX_SIZE,
+    ttl=settings.BREW_ANALYTICS_CACHE_TTL_SECONDS,
+)
+
+
+def _invalidate_brew_analytics(payload: str | None) -> None:
+    if payload is None:
+        brew_analytics_cache.clear()
+    else:
+        brew_analytics_cache.invalidate(UUID(payload))
+
+
+change_listener.subscribe(BREW_READINGS_CHANNEL, _invalidate_brew_analytics)
+
+
+class BrewAnalyticsCRUD:
+    """Brew analytics operations."""
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_db, scope="function")]) -> None:
+        """Initialize class."""
+        self.db = db
+
+    async def get_analyzed_brew_ids(self) -> list[UUID]:
+        """Get the ids of all brews that have readings."""
+        result = await self.db.execute(
+            select(BrewRollup.brew_id).where(BrewRollup.reading_count > 0).order_by(BrewRollup.brew_id),
+        )
+        return list(result.scalars().all())
+
+    async def get_analytics(self, brew_ids: Sequence[UUID]) -> list[BrewAnalytics]:
+        """Get analytics of brews, computing the ones not memoized yet in a single pass.
+
+        Read from the primary: a replica may not have caught up yet when a readings notification
+        drops an entry, and the stale result would then be memoized until the next readings arrive.
+
+        Args:
+            brew_ids (Sequence[UUID]): Brews to analyze.
+
+        Returns:
+            list[BrewAnalytics]: Analytics of each brew, in the order of ``brew_ids``.
+
+        """
+        analytics: dict[UUID, BrewAnalytics] = {}
+        if change_listener.connected:
+            for brew_id in brew_ids:
+                cached = brew_analytics_cache.get(brew_id)
+                if cached is not None:
+                    analytics[brew_id] = cached
+
+        missing = [brew_id for brew_id in brew_ids if brew_id not in analytics]
+        if missing:
+            generation = brew_analytics_cache.generation
+            computed = await self._compute_analytics(missing)
+            if change_listener.connected and brew_analytics_cache.generation == generation:
+                for result in computed:
+                    brew_analytics_cache.set(result.brew_id, result)
+            analytics.update((result.brew_id, result) for result in computed)
+
+        return [analytics[brew_id] for brew_id in brew_ids]
+
+    async def _compute_analytics(self, brew_ids: Sequence[UUID]) -> list[BrewAnalytics]:
+        """Fetch the readings of brews and analyze them."""
+        order = BrewReading.recorded_at
+        result = await self.db.execute(
+            select(
+                BrewReading.brew_id,
+                array_agg(aggregate_order_by(cast(func.extract("epoch", BrewReading.recorded_at), Float), order)),
+                array_agg(aggregate_order_by(BrewReading.ph, order)),
+                array_agg(aggregate_order_by(BrewReading.gravity, order)),
+            )
+            .where(BrewReading.brew_id.in_(brew_ids))
+            .group_by(BrewReading.brew_id),
+        )
+        rows = result.all()
+        # The analysis can take a while for large brews, so do not hold on to a connection meanwhile,
+        # and convert and analyze the readings off the event loop.
+        await release_connection(self.db)
+        lengths, results = await asyncio.to_thread(_analyze_rows, brew_ids, rows)
+
+        return [
+            BrewAnalytics(
+                brew_id=brew_id,
+                reading_count=reading_count,
+                original_gravity=_optional(original_gravity),
+                final_gravity=_optional(final_gravity),
+                abv=_optional(abv),
+                fermentation_rate=_optional(fermentation_rate),
+                rate_curve=[_optional(value) for value in rate_curve],
+                hours_to_target_ph=_optional(hours_to_target_ph),
+            )
+            for (
+                brew_id, reading_count, original_gravity, final_gravity, abv, fermentation_rate, rate_curve,
+                hours_to_target_ph,
+            ) in zip(
+                brew_ids,
+                lengths.tolist(),
+                results["original_gravity"].tolist(),
+                results["final_gravity"].tolist(),
+                results["abv"].tolist(),
+                results["fermentation_rate"].tolist(),
+                results["rate_curve"].tolist(),
+                results["hours_to_target_ph"].tolist(),
+                strict=True,
+            )
+        ]
+
+
+def _analyze_rows(brew_ids: Sequence[UUID], rows: Sequence[Row]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Analyze rows of brew ids and reading arrays, returning reading counts and metrics in ``brew_ids`` order."""
+    arrays = {brew_id: (times, ph, gravity) for brew_id, times, ph, gravity in rows}
+    lengths, readings = concatenate_readings([arrays.get(brew_id, ([], [], [])) for brew_id in brew_ids])
+    return lengths, analyze_readings(
+        lengths, readings, settings.BREW_ANALYTICS_TARGET_PH, settings.BREW_ANALYTICS_CURVE_POINTS,
+    )
+
+
+def concatenate_readings(
+    columns: Sequence[tuple[Sequence[float | None], Sequence[float | None], Sequence[float | None]]],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenate the reading times, pH and gravity arrays of brews into the input of `analyze_readings`.
+
+    Every array is converted to NumPy on its own and copied once into the concatenated rows, without
+    building intermediate Python lists of all readings. None becomes NaN.
+
+    Args:
+        columns (Sequence[tuple]): Times, pH and gravity of each brew.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Number of readings of each brew and the rows of readings.
+
+    """
+    lengths = np.fromiter((len(times) for times, _, _ in columns), dtype=np.int64, count=len(columns))
+    readings = np.stack([
+        np.concatenate([np.empty(0), *(np.asarray(brew[i], dtype=np.float64) for brew in columns)])
+        for i in range(3)
+    ])
+    return lengths, readings
+
+
+def analyze_readings(
+    lengths: np.ndarray, readings: np.ndarray, target_ph: float, curve_points: int,
+) -> dict[str, np.ndarray]:
+    """Compute fermentation metrics of many brews at once.
+
+    Readings of all brews are concatenated brew by brew, each brew's in time order. Original and
+    final gravity are the first and last gravity readings, and ABV is estimated from the drop
+    between them. The rate curve splits the time between them into ``curve_points`` equal slots
+    holding the gravity drop per day, each gap between consecutive gravity readings counting
+    towards the slot its midpoint falls in.
+
+    Args:
+        lengths (np.ndarray): Number of readings of each brew.
+        readings (np.ndarray): Rows of reading times in seconds since the epoch, pH and specific
+            gravity, NaN where not measured.
+        target_ph (float): pH at which a brew counts as done.
+        curve_points (int): Number of slots in the rate curve.
+
+    Returns:
+        dict[str, np.ndarray]: Per brew ``original_gravity``, ``final_gravity``, ``abv``,
+            ``fermentation_rate`` (gravity drop per day) and ``hours_to_target_ph`` (from the first
+            reading), NaN where unknown, and ``rate_curve`` of shape (brews, curve_points).
+
+    """
+    times, ph, gravity = readings
+    brew_count = len(lengths)
+    brew = np.repeat(np.arange(brew_count), lengths)
+    start_time = _per_brew(brew_count, brew[_run_starts(brew)], times[_run_starts(brew)])
+
+    measured = np.flatnonzero(~np.isnan(gravity))
+    measured_brew = brew[measured]
+    first = measured[_run_starts(measured_brew)]
+    last = measured[_run_ends(measured_brew)]
+    original_gravity = _per_brew(brew_count, brew[first], gravity[first])
+    original_time = _per_brew(brew_count, brew[first], times[first])
+    final_gravity = _per_brew(brew_count, brew[last], gravity[last])
+    final_time = _per_brew(brew_count, brew[last], times[last])
+
+    days = (final_time - original_time) / SECONDS_PER_DAY
+    drop = original_gravity - final_gravity
+    fermentation_rate = np.divide(drop, days, out=np.full(brew_count, np.nan), where=days > 0)
+
+    # Gaps between consecutive gravity readings of the same brew
+    same_brew = measured_brew[1:] == measured_brew[:-1]
+    gap_brew = measured_brew[1:][same_brew]
+    gap_start = times[measured[:-1]][same_brew]
+    gap_end = times[measured[1:]][same_brew]
+    gap_drop = (gravity[measured[:-1]] - gravity[measured[1:]])[same_brew]
+    span = final_time[gap_brew] - original_time[gap_brew]
+    slot = np.minimum(
+        ((gap_start + gap_end) / 2 - original_time[gap_brew]) / span * curve_points, curve_points - 1,
+    ).astype(np.int64)
+    key = gap_brew * curve_points + slot
+    slot_drop = np.bincount(key, weights=gap_drop, minlength=brew_count * curve_points)
+    slot_days = np.bincount(key, weights=(gap_end - gap_start) / SECONDS_PER_DAY, minlength=brew_count * curve_points)
+    rate_curve = np.divide(
+        slot_drop, slot_days, out=np.full(brew_count * curve_points, np.nan), where=slot_days > 0,
+    ).reshape(brew_count, curve_points)
+
+    done = np.flatnonzero(ph <= target_ph)
+    done = done[_run_starts(brew[done])]
+    hours_to_target_ph = _per_brew(
+        brew_count, brew[done], (times[done] - start_time[brew[done]]) / SECONDS_PER_HOUR,
+    )
+
+    return {
+        "original_gravity": original_gravity,
+        "final_gravity": final_gravity,
+        "abv": drop * ABV_FACTOR,
+        "fermentation_rate": fermentation_rate,
+        "rate_curve": rate_curve,
+        "hours_to_target_ph": hours_to_target_ph,
+    }
+
+
+def average_analytics(analytics: Sequence[BrewAnalytics]) -> BrewAnalyticsAverage:
+    """Get the average of brew analytics, ignoring brews where a metric is unknown."""
+    metrics = np.array(
+        [[brew.abv, brew.fermentation_rate, brew.hours_to_target_ph] for brew in analytics], dtype=np.float64,
+    ).reshape(len(analytics), 3)
+    curves = np.array([brew.rate_curve for brew in analytics], dtype=np.float64).reshape(
+        len(analytics), settings.BREW_ANALYTICS_CURVE_POINTS,
+    )
+    abv, fermentation_rate, hours_to_target_ph = _nanmean(metrics).tolist()
+    return BrewAnalyticsAverage(
+        brew_count=len(analytics),
+        abv=_optional(abv),
+        fermentation_rate=_optional(fermentation_rate),
+        rate_curve=[_optional(value) for value in _nanmean(curves).tolist()],
+        hours_to_target_ph=_optional(hours_to_target_ph),
+    )
+
+
+def compare_analytics(
+    analytics: Sequence[BrewAnalytics], average: BrewAnalyticsAverage,
+) -> list[BrewAnalyticsComparison]:
+    """Add the difference from the average brew to brew analytics."""
+    return [
+        BrewAnalyticsComparison(
+            **brew.model_dump(),
+            abv_difference=_difference(brew.abv, average.abv),
+            fermentation_rate_difference=_difference(brew.fermentation_rate, average.fermentation_rate),
+            hours_to_target_ph_difference=_difference(brew.hours_to_target_ph, average.hours_to_target_ph),
+        )
+        for brew in analytics
+    ]
+
+
+def _run_starts(keys: np.ndarray) -> np.ndarray:
+    """Get a mask of the first element of every run of equal keys."""
+    return np.concatenate(([True], keys[1:] != keys[:-1]))[:len(keys)]
+
+
+def _run_ends(keys: np.ndarray) -> np.ndarray:
+    """Get a mask of the last element of every run of equal keys."""
+    return np.concatenate((keys[1:] != keys[:-1], [True]))[:len(keys)]
+
+
+def _per_brew(brew_count: int, brews: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Scatter values of some brews into an array over all brews, NaN for the others."""
+    result = np.full(brew_count, np.nan)
+    result[brews] = values
+    return result
+
+
+def _nanmean(values: np.ndarray) -> np.ndarray:
+    """Get the mean of every column ignoring NaN, NaN for columns without any values."""
+    known = ~np.isnan(values)
+    counts = known.sum(axis=0)
+    totals = np.where(known, values, 0).sum(axis=0)
+    return np.divide(totals, counts, out=np.full(values.shape[1], np.nan), where=counts > 0)
+
+
+def _optional(value: float) -> float | None:
+    """Convert NaN into None."""
+    return None if isnan(value) else value
+
+
+def _difference(value: float | None, average: float | None) -> float | None:
+    """Get the difference of a value from the average, if both are known."""
+    return None if value is None or average is None else value - average
@@ -1,30 +1,421 @@
 """Brew CRUD operations."""
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime, timedelta
 from typing import Annotated
+from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import func, select
+from sqlalchemy import (
+    CTE,
+    ColumnCollection,
+    ColumnElement,
+    Float,
+    Integer,
+    Row,
+    Select,
+    case,
+    cast,
+    column,
+    func,
+    literal,
+    or_,
+    select,
+    table,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import UUID as PgUUID  # noqa: N811
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
-from kbalyzer.db.postgres import get_db
-from kbalyzer.db.schemas.brews import Brew
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.notify import BREW_READINGS_CHANNEL, change_listener
+from kbalyzer.db.pagination import CountMode, decode_cursor, encode_cursor, fetch_page
+from kbalyzer.db.postgres import get_db, get_read_db
+from kbalyzer.db.schemas.brews import Brew, BrewReading, BrewRollup
 from kbalyzer.logging import get_logger
+from kbalyzer.models.brews import BrewStats, ReadingBucket, ReadingCreate, ReadingSeries, ReadingStats
+from kbalyzer.settings import settings
 
 logger = get_logger(__name__)
 
+READING_COLUMNS = ("brew_id", "recorded_at", "temperature", "ph", "gravity")
+READING_METRICS = ("temperature", "ph", "gravity")
+ROLLUP_COLUMNS = (
+    "brew_id",
+    "reading_count",
+    "first_recorded_at",
+    "last_recorded_at",
+    "min_temperature",
+    "max_temperature",
+    "first_gravity",
+    "first_gravity_at",
+    "latest_gravity",
+    "latest_gravity_at",
+)
+EXPORT_BATCH_SIZE = 1000
+
+# Stats of brews without readings, cached so that their lookups are not repeated on every listing.
+NO_STATS = BrewStats(
+    reading_count=0,
+    first_recorded_at=None,
+    last_recorded_at=None,
+    min_temperature=None,
+    max_temperature=None,
+    first_gravity=None,
+    latest_gravity=None,
+    fermentation_rate=None,
+)
+
+# Brew stats keyed by brew id. Entries are dropped whenever readings of the brew change, on every
+# worker, through the brew readings notification.
+brew_stats_cache: TTLCache[UUID, BrewStats] = TTLCache(
+    max_size=settings.BREW_STATS_CACHE_MAX_SIZE,
+    ttl=settings.BREW_STATS_CACHE_TTL_SECONDS,
+)
+
+
+def _invalidate_brew_stats(payload: str | None) -> None:
+    if payload is None:
+        brew_stats_cache.clear()
+    else:
+        brew_stats_cache.invalidate(UUID(payload))
+
+
+change_listener.subscribe(BREW_READINGS_CHANNEL, _invalidate_brew_stats)
+
 
 class BrewCRUD:
     """Brew CRUD operations."""
 
-    def __init__(self, db: Annotated[AsyncSession, Depends(get_db)]) -> None:
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_db, scope="function")]) -> None:
         """Initialize class."""
         self.db = db
 
-    async def get_brews(self, skip: int = 0, limit: int = 100) -> Sequence[Brew]:
-        """Get all brews."""
-        result = await self.db.execute(select(Brew).offset(skip).limit(limit))
+    async def get_brews(self, skip: int = 0, limit: int = 100, cursor: str | None = None) -> Sequence[Brew]:
+        """Get all brews ordered by creation date.
+
+        Args:
+            skip (int): Number of brews to skip, ignored when a cursor is given.
+            limit (int): Maximum number of brews to return.
+            cursor (str | None): Cursor from `brew_cursor` to return the brews after.
+
+        Returns:
+            Sequence[Brew]: Page of brews.
+
+        Raises:
+            ValueError: If the cursor is invalid
+
+        """
+        result = await self.db.execute(self._brews_query(skip, limit, cursor))
         return result.scalars().all()
 
+    async def get_brews_page(
+        self, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = "exact",
+    ) -> tuple[list[Brew], int]:
+        """Get a page of brews and the total brew count in a single query, without their stats.
+
+        Stats change with every ingested batch while brews rarely do, so they are fetched
+        separately with `get_brew_stats`.
+
+        Args:
+            skip (int): Number of brews to skip, ignored when a cursor is given.
+            limit (int): Maximum number of brews to return.
+            cursor (str | None): Cursor from `brew_cursor` to return the brews after.
+            count (CountMode): Whether to count brews exactly or estimate from planner statistics.
+
+        Returns:
+            tuple[list[Brew], int]: Page of brews and total brew count.
+
+        Raises:
+            ValueError: If the cursor is invalid
+
+        """
+        query = self._brews_query(skip, limit, cursor).options(noload(Brew.stats))
+        return await fetch_page(self.db, query, Brew.__table__, count)
+
+    @staticmethod
+    def _brews_query(skip: int, limit: int, cursor: str | None) -> Select[tuple[Brew]]:
+        """Build the ordered brew listing query."""
+        query = select(Brew).order_by(Brew.creation_date, Brew.id).limit(limit)
+        if cursor is None:
+            return query.offset(skip)
+
+        creation_date, brew_id = decode_cursor(cursor, 2)
+        try:
+            after = (datetime.fromisoformat(creation_date), UUID(brew_id))
+        except ValueError:
+            err = "Invalid pagination cursor"
+            raise ValueError(err) from None
+        return query.where(tuple_(Brew.creation_date, Brew.id) > after)
+
+    @staticmethod
+    def brew_cursor(brew: Brew) -> str:
+        """Get the cursor pointing after a brew."""
+        return encode_cursor(brew.creation_date.isoformat(), str(brew.id))
+
+    async def get_brew_stats(self, brew_ids: Sequence[UUID]) -> dict[UUID, BrewStats]:
+        """Get stats of brews, loading the ones not cached yet in a single query.
+
+        Read from the primary: a replica may not have caught up yet when a readings notification
+        drops an entry, and the stale stats would then be cached until the next readings arrive.
+
+        Args:
+            brew_ids (Sequence[UUID]): Brews to get the stats of.
+
+        Returns:
+            dict[UUID, BrewStats]: Stats keyed by brew id, missing for brews without readings.
+
+        """
+        stats: dict[UUID, BrewStats] = {}
+        if change_listener.connected:
+            for brew_id in brew_ids:
+                cached = brew_stats_cache.get(brew_id)
+                if cached is not None:
+                    stats[brew_id] = cached
+
+        missing = [brew_id for brew_id in brew_ids if brew_id not in stats]
+        if missing:
+            generation = brew_stats_cache.generation
+            result = await self.db.execute(select(BrewRollup).where(BrewRollup.brew_id.in_(missing)))
+            loaded = {rollup.brew_id: BrewStats.model_validate(rollup) for rollup in result.scalars()}
+            for brew_id in missing:
+                stats[brew_id] = loaded.get(brew_id, NO_STATS)
+                if change_listener.connected and brew_stats_cache.generation == generation:
+                    brew_stats_cache.set(brew_id, stats[brew_id])
+
+        return {brew_id: brew_stats for brew_id, brew_stats in stats.items() if brew_stats is not NO_STATS}
+
     async def brew_count(self) -> int:
         """Get brew count."""
         return (await self.db.execute(select(func.count()).select_from(Brew))).scalar_one()
+
+    async def search_brews(self, query: str, limit: int = 20) -> Sequence[Row[tuple[Brew, float]]]:
+        """Search brews by partial or misspelled name, best matches first.
+
+        Brews match when their name contains the query or a word in it is similar to the query
+        (pg_trgm `<%`). Both conditions are served by the trigram index on `brew.name`.
+
+        Args:
+            query (str): Text to search for.
+            limit (int): Maximum number of brews to return.
+
+        Returns:
+            Sequence[Row[tuple[Brew, float]]]: Matching brews with their word similarity to the query.
+
+        """
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        score = func.word_similarity(query, Brew.name)
+        result = await self.db.execute(
+            select(Brew, score.label("score"))
+            .where(or_(Brew.name.ilike(pattern, escape="\\"), literal(query).op("<%")(Brew.name)))
+            .order_by(score.desc(), Brew.name)
+            .limit(limit),
+        )
+        return result.all()
+
+    async def get_brew(self, brew_id: UUID) -> Brew | None:
+        """Get brew by id."""
+        return await self.db.get(Brew, brew_id)
+
+    async def add_readings(self, brew_id: UUID, readings: Sequence[ReadingCreate]) -> int:
+        """Bulk insert readings for a brew.
+
+        Readings are streamed into a temporary staging table with COPY and then moved into the
+        readings table in one statement, skipping readings that are already stored so that
+        sensors can safely retry a batch.
+
+        Args:
+            brew_id (UUID): Brew the readings belong to.
+            readings (Sequence[ReadingCreate]): Readings to insert.
+
+        Returns:
+            int: Number of readings inserted.
+
+        """
+        # Creating the staging table also opens the transaction COPY has to run in.
+        await self.db.execute(text(
+            "CREATE TEMPORARY TABLE brew_reading_stage (LIKE brew_reading) ON COMMIT DROP",
+        ))
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            "brew_reading_stage",
+            columns=READING_COLUMNS,
+            records=[(brew_id, r.recorded_at, r.temperature, r.ph, r.gravity) for r in readings],
+        )
+
+        stage = table("brew_reading_stage", *(column(name) for name in READING_COLUMNS))
+        inserted = (
+            insert(BrewReading)
+            .from_select(READING_COLUMNS, select(stage))
+            .on_conflict_do_nothing()
+            .returning(BrewReading.recorded_at, BrewReading.temperature, BrewReading.gravity)
+            .cte("inserted")
+        )
+        batch = _rollup_of(inserted, brew_id).cte("batch")
+        rollup = insert(BrewRollup).from_select(ROLLUP_COLUMNS, select(batch).where(batch.c.reading_count > 0))
+        rollup = rollup.on_conflict_do_update(
+            index_elements=[BrewRollup.brew_id], set_=_merge_rollup(rollup.excluded),
+        ).returning(BrewRollup.brew_id).cte("rollup")
+
+        # Referencing the rollup upsert makes it part of the statement, so readings and rollup are
+        # written in the same round trip.
+        result = await self.db.execute(
+            select(batch.c.reading_count, select(func.count()).select_from(rollup).scalar_subquery()),
+        )
+        inserted_count = result.one()[0]
+        await self.db.commit()
+        return inserted_count
+
+    async def get_reading_series(
+        self, brew_id: UUID, start: datetime | None = None, end: datetime | None = None, points: int = 500,
+    ) -> ReadingSeries:
+        """Get readings of a brew downsampled into equally sized time buckets.
+
+        Bucketing and aggregation happen in a single grouped query over the readings index, so the
+        response holds at most ``points`` buckets no matter how many readings the brew has.
+
+        Args:
+            brew_id (UUID): Brew to get the readings of.
+            start (datetime | None): Start of the time range, defaults to the first reading.
+            end (datetime | None): End of the time range, defaults to the last reading.
+            points (int): Maximum number of buckets to return.
+
+        Returns:
+            ReadingSeries: Min, max and mean of every metric per non-empty bucket.
+
+        """
+        start = start if start is None or start.tzinfo else start.replace(tzinfo=UTC)
+        end = end if end is None or end.tzinfo else end.replace(tzinfo=UTC)
+        if start is None or end is None:
+            first, last = (await self.db.execute(
+                select(func.min(BrewReading.recorded_at), func.max(BrewReading.recorded_at))
+                .where(BrewReading.brew_id == brew_id),
+            )).one()
+            start = start or first
+            end = end or last
+
+        if start is None or end is None or end < start:
+            return ReadingSeries(brew_id=brew_id, start=start, end=end, bucket_seconds=0, buckets=[])
+
+        # Readings exactly at the end of the range are folded into the last bucket.
+        bucket_seconds = max((end - start).total_seconds() / points, 1e-6)
+        epoch = func.extract("epoch", BrewReading.recorded_at)
+        bucket = cast(
+            func.least(func.floor((epoch - literal(start.timestamp(), Float)) / bucket_seconds), points - 1), Integer,
+        ).label("bucket")
+        aggregates = [
+            aggregate(getattr(BrewReading, metric))
+            for metric in READING_METRICS
+            for aggregate in (func.min, func.max, func.avg)
+        ]
+        rows = (await self.db.execute(
+            select(bucket, func.count(), *aggregates)
+            .where(
+                BrewReading.brew_id == brew_id,
+                BrewReading.recorded_at >= start,
+                BrewReading.recorded_at <= end,
+            )
+            .group_by(bucket)
+            .order_by(bucket),
+        )).all()
+
+        buckets = []
+        for index, count, *values in rows:
+            stats = {
+                metric: None if values[i * 3] is None else ReadingStats(
+                    min=values[i * 3], max=values[i * 3 + 1], mean=values[i * 3 + 2],
+                )
+                for i, metric in enumerate(READING_METRICS)
+            }
+            buckets.append(ReadingBucket(
+                start=start + timedelta(seconds=index * bucket_seconds), count=count, **stats,
+            ))
+
+        return ReadingSeries(
+            brew_id=brew_id, start=start, end=end, bucket_seconds=bucket_seconds, buckets=buckets,
+        )
+
+    async def stream_brews(self) -> AsyncIterator[Sequence[Row]]:
+        """Stream all brews in batches from a server side cursor."""
+        query = select(Brew.id, Brew.name, Brew.creation_date).order_by(Brew.creation_date, Brew.id)
+        async for partition in self._stream(query):
+            yield partition
+
+    async def stream_readings(self, brew_id: UUID | None = None) -> AsyncIterator[Sequence[Row]]:
+        """Stream readings, optionally of a single brew, in batches from a server side cursor."""
+        query = select(*(getattr(BrewReading, name) for name in READING_COLUMNS)).order_by(
+            BrewReading.brew_id, BrewReading.recorded_at,
+        )
+        if brew_id is not None:
+            query = query.where(BrewReading.brew_id == brew_id)
+        async for partition in self._stream(query):
+            yield partition
+
+    async def _stream(self, query: Select) -> AsyncIterator[Sequence[Row]]:
+        """Stream query results in batches so only one batch is held in memory at a time."""
+        result = await self.db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            yield partition
+
+
+def _rollup_of(readings: CTE, brew_id: UUID) -> Select:
+    """Build the rollup of a set of readings of one brew, a single row even when there are none."""
+    gravity_readings = select(readings.c.recorded_at, readings.c.gravity).where(readings.c.gravity.is_not(None))
+    first_gravity = gravity_readings.order_by(readings.c.recorded_at).limit(1).subquery()
+    latest_gravity = gravity_readings.order_by(readings.c.recorded_at.desc()).limit(1).subquery()
+    return select(
+        literal(brew_id, PgUUID(as_uuid=True)).label("brew_id"),
+        func.count().label("reading_count"),
+        func.min(readings.c.recorded_at).label("first_recorded_at"),
+        func.max(readings.c.recorded_at).label("last_recorded_at"),
+        func.min(readings.c.temperature).label("min_temperature"),
+        func.max(readings.c.temperature).label("max_temperature"),
+        select(first_gravity.c.gravity).scalar_subquery().label("first_gravity"),
+        select(first_gravity.c.recorded_at).scalar_subquery().label("first_gravity_at"),
+        select(latest_gravity.c.gravity).scalar_subquery().label("latest_gravity"),
+        select(latest_gravity.c.recorded_at).scalar_subquery().label("latest_gravity_at"),
+    ).select_from(readings)
+
+
+def _merge_rollup(new: ColumnCollection) -> dict[str, ColumnElement]:
+    """Build the update merging a batch rollup into the stored rollup of a brew.
+
+    Readings may arrive out of order, so first and latest gravity are only replaced by readings
+    that are earlier or later than the stored ones. `least` and `greatest` ignore NULLs.
+    """
+    old = BrewRollup.__table__.c
+    return {
+        "reading_count": old.reading_count + new.reading_count,
+        "first_recorded_at": func.least(old.first_recorded_at, new.first_recorded_at),
+        "last_recorded_at": func.greatest(old.last_recorded_at, new.last_recorded_at),
+        "min_temperature": func.least(old.min_temperature, new.min_temperature),
+        "max_temperature": func.greatest(old.max_temperature, new.max_temperature),
+        "first_gravity": case(
+            (or_(old.first_gravity_at.is_(None), new.first_gravity_at < old.first_gravity_at), new.first_gravity),
+            else_=old.first_gravity,
+        ),
+        "first_gravity_at": func.least(old.first_gravity_at, new.first_gravity_at),
+        "latest_gravity": case(
+            (or_(old.latest_gravity_at.is_(None), new.latest_gravity_at > old.latest_gravity_at), new.latest_gravity),
+            else_=old.latest_gravity,
+        ),
+        "latest_gravity_at": func.greatest(old.latest_gravity_at, new.latest_gravity_at),
+    }
+
+
+class BrewReadCRUD(BrewCRUD):
+    """Brew read operations served by a read replica when one is configured."""
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_read_db, scope="function")]) -> None:
+        """Initialize class."""
+        super().__init__(db)
+
+
+class BrewStreamCRUD(BrewCRUD):
+    """Brew read operations for streaming responses, keeping the session open until the response is sent."""
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_read_db, scope="request")]) -> None:
+        """Initialize class."""
+        super().__init__(db)
@@ -0,0 +1,99 @@
+"""Token CRUD operations."""
+import asyncio
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import Row, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from kbalyzer.auth import revocation_index
+from kbalyzer.db.postgres import get_db
+from kbalyzer.db.schemas.token import RevokedToken
+from kbalyzer.logging import get_logger
+from kbalyzer.settings import settings
+
+logger = get_logger(__name__)
+
+# Revocations are re-read this far behind the newest one seen, so that rows committed out of order
+# or stamped by a worker with a slightly different clock are not missed.
+REFRESH_OVERLAP = timedelta(seconds=30)
+PURGE_INTERVAL = timedelta(hours=1)
+
+
+class TokenCRUD:
+    """Token CRUD operations."""
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_db, scope="function")]) -> None:
+        """Initialize class."""
+        self.db = db
+
+    async def revoke_token(self, jti: str, expires_at: datetime) -> None:
+        """Revoke an access token, applying it to this worker immediately.
+
+        Args:
+            jti (str): Id of the token.
+            expires_at (datetime): Expiry of the token, after which the revocation can be forgotten.
+
+        """
+        await self.db.execute(
+            insert(RevokedToken).values(jti=jti, expires_at=expires_at).on_conflict_do_nothing(),
+        )
+        await self.db.commit()
+        revocation_index.add(jti, expires_at)
+
+    async def get_revoked_tokens(self, since: datetime | None = None) -> Sequence[Row[tuple[str, datetime, datetime]]]:
+        """Get revoked tokens that have not expired yet.
+
+        Args:
+            since (datetime | None): Only return tokens revoked after this time.
+
+        Returns:
+            Sequence[Row[tuple[str, datetime, datetime]]]: Token id, expiry and revocation time of each token.
+
+        """
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > datetime.now(UTC),
+        )
+        if since is not None:
+            query = query.where(RevokedToken.revoked_at > since)
+        return (await self.db.execute(query)).all()
+
+    async def delete_expired_tokens(self) -> int:
+        """Delete revocations of tokens that have expired.
+
+        Returns:
+            int: Number of revocations deleted.
+
+        """
+        result = await self.db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(UTC)))
+        await self.db.commit()
+        return result.rowcount
+
+
+async def refresh_revocation_index(token_crud: TokenCRUD) -> None:
+    """Load the revocations made since the last refresh into the revocation index."""
+    since = None if revocation_index.watermark is None else revocation_index.watermark - REFRESH_OVERLAP
+    for jti, expires_at, revoked_at in await token_crud.get_revoked_tokens(since):
+        revocation_index.add(jti, expires_at)
+        if revocation_index.watermark is None or revoked_at > revocation_index.watermark:
+            revocation_index.watermark = revoked_at
+    revocation_index.evict_expired()
+
+
+async def sync_revocations() -> None:
+    """Keep the revocation index of this worker up to date until cancelled."""
+    last_purge = datetime.min.replace(tzinfo=UTC)
+    while True:
+        try:
+            async for db in get_db():
+                token_crud = TokenCRUD(db)
+                await refresh_revocation_index(token_crud)
+                if datetime.now(UTC) - last_purge >= PURGE_INTERVAL:
+                    last_purge = datetime.now(UTC)
+                    await token_crud.delete_expired_tokens()
+        except Exception:
+            logger.exception("Failed to refresh token revocations")
+        await asyncio.sleep(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
@@ -4,32 +4,137 @@ from typing import Annotated, Any
 from uuid import UUID
 
 import jwt
+import orjson
 from fastapi import Cookie, Depends, HTTPException, status
 from jwt.exceptions import InvalidTokenError
-from sqlalchemy import func, select
+from sqlalchemy import Select, delete, exists, func, inspect, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
-from kbalyzer.auth import get_password_hash, oauth2_scheme, verify_password
-from kbalyzer.db.postgres import get_db
+from kbalyzer.auth import (
+    get_password_hash,
+    get_password_hash_async,
+    oauth2_scheme,
+    password_pool,
+    revocation_index,
+    verify_password_async,
+)
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.notify import USER_CHANGED_CHANNEL, change_listener
+from kbalyzer.db.pagination import CountMode, decode_cursor, encode_cursor, fetch_page
+from kbalyzer.db.postgres import get_db, get_read_db, release_connection
 from kbalyzer.db.schemas.user import UserSchema
 from kbalyzer.logging import get_logger
+from kbalyzer.models.auth import TokenPrincipal
 from kbalyzer.models.user import UserCreate
 from kbalyzer.settings import settings
 
 logger = get_logger(__name__)
 
+# Column snapshots of authenticated users keyed by token subject (email). Snapshots rather than ORM
+# instances are cached so that every request gets its own instance bound to its own session.
+principal_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# Current token version of users keyed by id, compared against the version claim of access tokens.
+token_version_cache: TTLCache[UUID, int] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
+
+
+def _invalidate_user(payload: str | None) -> None:
+    """Drop the cached entries of a changed user on this worker, or of all users if changes may have been missed."""
+    if payload is None:
+        principal_cache.clear()
+        token_version_cache.clear()
+        return
+
+    user = orjson.loads(payload)
+    principal_cache.invalidate(user["email"])
+    token_version_cache.invalidate(UUID(user["id"]))
+
+
+# Both caches are dropped on every user update or delete, on every worker.
+change_listener.subscribe(USER_CHANGED_CHANNEL, _invalidate_user)
+
+# Updating any of these fields revokes all tokens issued to the user.
+TOKEN_REVOKING_FIELDS = frozenset({"hashed_password", "role", "is_active"})
+
+
+def access_token_claims(user: UserSchema) -> dict[str, Any]:
+    """Get the authorization claims to encode in the access token of a user."""
+    return {"typ": "access", "uid": str(user.id), "role": user.role, "ver": user.token_version}
+
+
+def _snapshot_user(user: UserSchema) -> dict[str, Any]:
+    """Copy the column values of a loaded user."""
+    return {attr.key: getattr(user, attr.key) for attr in inspect(UserSchema).column_attrs}
+
+
 class UserCRUD:
     """User CRUD operations."""
 
-    def __init__(self, db: Annotated[AsyncSession, Depends(get_db)]) -> None:
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_db, scope="function")]) -> None:
         """Initialize class."""
         self.db = db
 
-    async def get_users(self, skip: int = 0, limit: int = 100) -> Sequence[UserSchema]:
-        """Get all users."""
-        result = await self.db.execute(select(UserSchema).offset(skip).limit(limit))
+    async def get_users(self, skip: int = 0, limit: int = 100, cursor: str | None = None) -> Sequence[UserSchema]:
+        """Get all users ordered by email.
+
+        Args:
+            skip (int): Number of users to skip, ignored when a cursor is given.
+            limit (int): Maximum number of users to return.
+            cursor (str | None): Cursor from `user_cursor` to return the users after.
+
+        Returns:
+            Sequence[UserSchema]: Page of users.
+
+        Raises:
+            ValueError: If the cursor is invalid
+
+        """
+        result = await self.db.execute(self._users_query(skip, limit, cursor))
         return result.scalars().all()
 
+    async def get_users_page(
+        self, skip: int = 0, limit: int = 100, cursor: str | None = None, count: CountMode = "exact",
+    ) -> tuple[list[UserSchema], int]:
+        """Get a page of users and the total user count in a single query.
+
+        Args:
+            skip (int): Number of users to skip, ignored when a cursor is given.
+            limit (int): Maximum number of users to return.
+            cursor (str | None): Cursor from `user_cursor` to return the users after.
+            count (CountMode): Whether to count users exactly or estimate from planner statistics.
+
+        Returns:
+            tuple[list[UserSchema], int]: Page of users and total user count.
+
+        Raises:
+            ValueError: If the cursor is invalid
+
+        """
+        return await fetch_page(self.db, self._users_query(skip, limit, cursor), UserSchema.__table__, count)
+
+    @staticmethod
+    def _users_query(skip: int, limit: int, cursor: str | None) -> Select[tuple[UserSchema]]:
+        """Build the ordered user listing query."""
+        query = select(UserSchema).order_by(UserSchema.email).limit(limit)
+        if cursor is None:
+            return query.offset(skip)
+
+        (email,) = decode_cursor(cursor, 1)
+        return query.where(UserSchema.email > email)
+
+    @staticmethod
+    def user_cursor(user: UserSchema) -> str:
+        """Get the cursor pointing after a user."""
+        return encode_cursor(user.email)
+
     async def user_count(self) -> int:
         """Get user count."""
         return (await self.db.execute(select(func.count()).select_from(UserSchema))).scalar_one()
@@ -44,6 +149,46 @@ class UserCRUD:
         result = await self.db.execute(select(UserSchema).where(UserSchema.id == user_id))
         return result.scalars().first()
 
+    async def get_principal(self, email: str) -> UserSchema | None:
+        """Get user by email, serving it from the principal cache when possible.
+
+        Cached users are attached to the current session without loading them, so they can be
+        updated through this class like any other user. They may lag behind changes made on other
+        workers until the user change notification arrives, so do not base updates on them.
+        """
+        snapshot = principal_cache.get(email) if change_listener.connected else None
+        if snapshot is not None:
+            user = UserSchema(**snapshot)
+            make_transient_to_detached(user)
+            return await self.db.merge(user, load=False)
+
+        generation = principal_cache.generation
+        user = await self.get_user_by_email(email)
+        if user is not None and change_listener.connected and principal_cache.generation == generation:
+            principal_cache.set(email, _snapshot_user(user))
+        return user
+
+    async def get_token_version(self, user_id: UUID) -> int | None:
+        """Get the current token version of a user, serving it from cache when possible.
+
+        Args:
+            user_id (UUID): Id of the user.
+
+        Returns:
+            int | None: Token version, or None if the user does not exist.
+
+        """
+        version = token_version_cache.get(user_id) if change_listener.connected else None
+        if version is not None:
+            return version
+
+        generation = token_version_cache.generation
+        result = await self.db.execute(select(UserSchema.token_version).where(UserSchema.id == user_id))
+        version = result.scalar_one_or_none()
+        if version is not None and change_listener.connected and token_version_cache.generation == generation:
+            token_version_cache.set(user_id, version)
+        return version
+
     async def create_user(self, user: UserCreate) -> UserSchema:
         """Create user.
 
@@ -57,89 +202,269 @@ class UserCRUD:
             ValueError: If user already exists
 
         """
-        if await self.get_user_by_email(user.email):
+        # Checking first spares existing users a password hash, and the insert still skips an email
+        # taken meanwhile.
+        taken = await self.db.scalar(select(exists().where(UserSchema.email == user.email)))
+        await release_connection(self.db)
+
+        db_user = None
+        if not taken:
+            args = user.model_dump(exclude={"password"})
+            args["hashed_password"] = await get_password_hash_async(user.password)
+            result = await self.db.scalars(
+                insert(UserSchema).values(args).on_conflict_do_nothing(index_elements=["email"]).returning(UserSchema),
+            )
+            db_user = result.one_or_none()
+        if db_user is None:
             err = "User already exists with that email"
             logger.error("Tried to create user with existing email: %s", user.email)
             raise ValueError(err)
 
-        args = user.model_dump()
-        args["hashed_password"] = get_password_hash(args["password"])
-        del args["password"]
-
-        db_user = UserSchema(**args)
-        self.db.add(db_user)
         await self.db.commit()
-        await self.db.refresh(db_user)
         return db_user
 
+    async def create_users(self, users: Sequence[UserCreate]) -> list[UserSchema | None]:
+        """Create many users with a single insert, skipping users whose email is taken.
+
+        Passwords are hashed in parallel on the password worker pool, except for emails that
+        already exist or appear earlier in the batch.
+
+        Args:
+            users (Sequence[UserCreate]): Users to create.
+
+        Returns:
+            list[UserSchema | None]: Created user for each input, or None if its email was taken.
+
+        """
+        emails = {user.email for user in users}
+        result = await self.db.execute(select(UserSchema.email).where(UserSchema.email.in_(emails)))
+        taken = set(result.scalars())
+        await release_connection(self.db)
+
+        # Iterating in reverse keeps the first occurrence of each email
+        new_users = {user.email: user for user in reversed(users) if user.email not in taken}
+        hashes = await password_pool.map(get_password_hash, [user.password for user in new_users.values()])
+        rows = [
+            {**user.model_dump(exclude={"password"}), "hashed_password": hashed_password}
+            for user, hashed_password in zip(new_users.values(), hashes, strict=True)
+        ]
+
+        created: dict[str, UserSchema] = {}
+        if rows:
+            result = await self.db.scalars(
+                insert(UserSchema).values(rows).on_conflict_do_nothing(index_elements=["email"]).returning(UserSchema),
+            )
+            created = {user.email: user for user in result}
+            await self.db.commit()
+
+        # Popping leaves None for later duplicates of an email within the batch
+        return [created.pop(user.email, None) for user in users]
+
     async def update_user(self, user: UserSchema, **kwargs: Any) -> UserSchema:
-        """Update user."""
-        for key, value in kwargs.items():
-            setattr(user, key, value)
-        self.db.add(user)
+        """Update user.
+
+        Only the given columns are written and read back, in a single statement.
+
+        Raises:
+            ValueError: If the user no longer exists
+
+        """
+        principal_cache.invalidate(user.email)
+        if TOKEN_REVOKING_FIELDS & kwargs.keys():
+            kwargs["token_version"] = UserSchema.token_version + 1
+
+        columns = [getattr(UserSchema, key) for key in kwargs]
+        result = await self.db.execute(
+            update(UserSchema)
+            .where(UserSchema.id == user.id)
+            .values(**kwargs)
+            .returning(*columns)
+            .execution_options(synchronize_session=False),
+        )
+        row = result.one_or_none()
         await self.db.commit()
-        await self.db.refresh(user)
+        if row is None:
+            err = f"Tried to update user that does not exist: {user.id}"
+            logger.error(err)
+            raise ValueError(err)
+
+        for key, value in zip(kwargs, row, strict=True):
+            set_committed_value(user, key, value)
+        principal_cache.invalidate(user.email)
+        token_version_cache.invalidate(user.id)
         return user
 
+    async def set_totp_secret_if_unset(self, user: UserSchema, secret: str) -> str:
+        """Store a TOTP secret for a user unless one is already stored.
+
+        The check and the write are a single conditional update, so a secret stored by a
+        concurrent request, possibly on another worker, is never overwritten.
+
+        Args:
+            user (UserSchema): User to store the secret for.
+            secret (str): Secret to store.
+
+        Returns:
+            str: The stored secret, which is an existing one if there was one.
+
+        Raises:
+            ValueError: If the user no longer exists
+
+        """
+        result = await self.db.execute(
+            update(UserSchema)
+            .where(UserSchema.id == user.id, or_(UserSchema.totp_secret.is_(None), UserSchema.totp_secret == ""))
+            .values(totp_secret=secret)
+            .returning(UserSchema.totp_secret)
+            .execution_options(synchronize_session=False),
+        )
+        stored = result.scalar_one_or_none()
+        if stored is None:
+            result = await self.db.execute(select(UserSchema.totp_secret).where(UserSchema.id == user.id))
+            stored = result.scalar_one_or_none()
+        await self.db.commit()
+        if stored is None:
+            err = f"Tried to set TOTP secret of user that does not exist: {user.id}"
+            logger.error(err)
+            raise ValueError(err)
+
+        set_committed_value(user, "totp_secret", stored)
+        principal_cache.invalidate(user.email)
+        return stored
+
     async def authenticate_user(self, email: str, password: str) -> UserSchema | None:
         """Authenticate user."""
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        # Do not hold on to a pooled connection while bcrypt runs
+        await release_connection(self.db)
+        if not await verify_password_async(password, user.hashed_password):
             return None
 
         return user
 
     async def delete_user(self, user_id: UUID) -> UserSchema:
         """Delete user."""
-        user = await self.get_user_by_id(user_id)
+        result = await self.db.scalars(
+            delete(UserSchema)
+            .where(UserSchema.id == user_id)
+            .returning(UserSchema)
+            .execution_options(synchronize_session=False),
+        )
+        user = result.one_or_none()
         if user is None:
             err = f"Tried to delete user that does not exist: {user_id}"
             logger.error(err)
             raise ValueError(err)
 
-        await self.db.delete(user)
         await self.db.commit()
+        principal_cache.invalidate(user.email)
+        token_version_cache.invalidate(user.id)
 
         return user
 
 
-async def get_current_user(
-    user_crud: Annotated[UserCRUD, Depends()],
-    token: Annotated[str | None, Depends(oauth2_scheme)] = None,
-    access_token: Annotated[str | None, Cookie()] = None,
-) -> UserSchema:
-    """Get the current user from the token."""
-    credentials_exception = HTTPException(
+class UserReadCRUD(UserCRUD):
+    """User read operations served by a read replica when one is configured."""
+
+    def __init__(self, db: Annotated[AsyncSession, Depends(get_read_db, scope="function")]) -> None:
+        """Initialize class."""
+        super().__init__(db)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        if access_token is not None:
-            logger.debug("Got access token from cookie")
-            token = access_token
 
-        if token is None:
-            logger.debug("Got no token from cookie or header")
-            raise credentials_exception
+
+def _decode_access_token(token: str | None, access_token: str | None) -> dict[str, Any]:
+    """Decode the access token of a request, preferring the cookie over the header."""
+    if access_token is not None:
+        logger.debug("Got access token from cookie")
+        token = access_token
+
+    if token is None:
+        logger.debug("Got no token from cookie or header")
+        raise _credentials_exception()
+    try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except InvalidTokenError:
-        raise credentials_exception from None
-    user = await user_crud.get_user_by_email(email=username)
-    if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception() from None
+    # Tokens handed out halfway through the 2FA flow only grant access to the second step
+    if payload.get("sub") is None or payload.get("typ", "access") != "access":
+        raise _credentials_exception()
+    if "jti" in payload and revocation_index.is_revoked(payload["jti"]):
+        logger.debug("Got revoked token")
+        raise _credentials_exception()
+    return payload
 
 
-async def get_current_admin_user(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+async def get_current_user(
+    user_crud: Annotated[UserCRUD, Depends()],
+    token: Annotated[str | None, Depends(oauth2_scheme)] = None,
+    access_token: Annotated[str | None, Cookie()] = None,
+) -> UserSchema:
+    """Get the current user from the token."""
+    payload = _decode_access_token(token, access_token)
+    return _check_token_version(payload, await user_crud.get_principal(email=payload["sub"]))
+
+
+async def get_current_user_uncached(
+    user_crud: Annotated[UserCRUD, Depends()],
+    token: Annotated[str | None, Depends(oauth2_scheme)] = None,
+    access_token: Annotated[str | None, Cookie()] = None,
 ) -> UserSchema:
-    """Get current admin user from the token."""
-    if current_user.role != "admin":
+    """Get the current user from the token, loaded from the database rather than the principal cache.
+
+    Use this in routes that decide how to update the user from its current state.
+    """
+    payload = _decode_access_token(token, access_token)
+    return _check_token_version(payload, await user_crud.get_user_by_email(payload["sub"]))
+
+
+def _check_token_version(payload: dict[str, Any], user: UserSchema | None) -> UserSchema:
+    """Reject tokens of missing users or issued before their tokens were revoked."""
+    if user is None or payload.get("ver", user.token_version) != user.token_version:
+        raise _credentials_exception()
+    return user
+
+
+async def get_token_principal(
+    user_crud: Annotated[UserCRUD, Depends()],
+    token: Annotated[str | None, Depends(oauth2_scheme)] = None,
+    access_token: Annotated[str | None, Cookie()] = None,
+) -> TokenPrincipal:
+    """Get the current principal from the claims of the token without loading the user.
+
+    The token version claim is checked against the cached version of the user, so revoked tokens
+    stop being accepted within `TOKEN_VERSION_CACHE_TTL_SECONDS`. Tokens issued before claims were
+    added fall back to loading the user. Any lookup ends its transaction, as routes may do their
+    work on a replica session and should not hold a primary connection meanwhile.
+    """
+    payload = _decode_access_token(token, access_token)
+    if "uid" not in payload:
+        user = await get_current_user(user_crud, token, access_token)
+        await release_connection(user_crud.db)
+        return TokenPrincipal(id=user.id, email=user.email, role=user.role, token_version=user.token_version)
+
+    principal = TokenPrincipal(
+        id=payload["uid"], email=payload["sub"], role=payload["role"], token_version=payload["ver"],
+    )
+    token_version = await user_crud.get_token_version(principal.id)
+    await release_connection(user_crud.db)
+    if token_version != principal.token_version:
+        raise _credentials_exception()
+    return principal
+
+
+async def get_token_admin_user(
+    principal: Annotated[TokenPrincipal, Depends(get_token_principal)],
+) -> TokenPrincipal:
+    """Get current admin principal from the claims of the token."""
+    if principal.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
+    return principal
@@ -0,0 +1,107 @@
+"""Postgres LISTEN/NOTIFY change notifications."""
+import asyncio
+from collections import defaultdict
+from collections.abc import Callable
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from kbalyzer.logging import get_logger
+from kbalyzer.settings import settings
+
+logger = get_logger(__name__)
+
+BREW_CHANGED_CHANNEL = "brew_changed"
+BREW_READINGS_CHANNEL = "brew_readings_changed"
+BROADCAST_CHANNEL = "broadcast"
+USER_CHANGED_CHANNEL = "user_changed"
+KEEPALIVE_SECONDS = 30.0
+RETRY_SECONDS = 5.0
+
+
+class ChangeListener:
+    """Dispatch Postgres notifications to in-process callbacks over one dedicated connection.
+
+    Callbacks get the payload of each notification. Notifications sent while the connection is down
+    are lost, so ``connected`` is False until it is back up and every callback is then run once with
+    None, letting caches drop whatever they hold. Caches should not serve entries while
+    ``connected`` is False.
+    """
+
+    def __init__(self, dsn: str) -> None:
+        """Initialize class.
+
+        Args:
+            dsn (str): Connection string of the database to listen on.
+
+        """
+        self.dsn = dsn
+        self.connected = False
+        self._callbacks: dict[str, list[Callable[[str | None], None]]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callable[[str | None], None]) -> None:
+        """Run a callback on every notification of a channel.
+
+        Subscriptions are picked up when the listener connects, so subscribe at import time.
+        """
+        self._callbacks[channel].append(callback)
+
+    def _run_callbacks(self, channel: str, payload: str | None) -> None:
+        for callback in self._callbacks[channel]:
+            callback(payload)
+
+    def _on_notification(self, _connection: asyncpg.Connection, _pid: int, channel: str, payload: str) -> None:
+        self._run_callbacks(channel, payload)
+
+    async def run(self) -> None:
+        """Listen for notifications until cancelled, reconnecting whenever the connection drops."""
+        while True:
+            try:
+                await self._listen()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("Change notification connection failed: %s", e)
+            finally:
+                self.connected = False
+            logger.warning("Reconnecting change notification listener in %.0fs", RETRY_SECONDS)
+            await asyncio.sleep(RETRY_SECONDS)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _connection: closed.set())
+        try:
+            for channel in self._callbacks:
+                await connection.add_listener(channel, self._on_notification)
+            self.connected = True
+            for channel in self._callbacks:
+                self._run_callbacks(channel, None)
+
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), KEEPALIVE_SECONDS)
+                except TimeoutError:
+                    await connection.execute("SELECT 1")
+        finally:
+            await connection.close(timeout=RETRY_SECONDS)
+
+
+class NotifyRelay:
+    """Broadcast relay sending messages to every worker through a Postgres notification channel.
+
+    Payloads are limited to 8000 bytes by Postgres, which is plenty for live events.
+    """
+
+    def __init__(self, engine: AsyncEngine, channel: str) -> None:
+        """Initialize class."""
+        self.engine = engine
+        self.channel = channel
+
+    async def publish(self, message: str) -> None:
+        """Send a message to all workers."""
+        async with self.engine.connect() as connection:
+            await connection.execute(select(func.pg_notify(self.channel, message)))
+            await connection.commit()
+
+
+change_listener = ChangeListener(settings.postgres_uri_sync)
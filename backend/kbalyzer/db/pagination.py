@@ -0,0 +1,101 @@
+"""Pagination helpers for list queries."""
+import base64
+import binascii
+import json
+from typing import Any, Literal
+
+from sqlalchemy import BigInteger, Select, Table, case, cast, column, func, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+CountMode = Literal["exact", "estimate"]
+
+_pg_class = table("pg_class", column("oid"), column("reltuples"))
+
+
+def encode_cursor(*values: str) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor.
+
+    Args:
+        *values (str): The sort key values of the last row on the page.
+
+    Returns:
+        str: URL safe cursor pointing after that row.
+
+    """
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list[str]:
+    """Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor to decode.
+        size (int): Expected number of sort key values in the cursor.
+
+    Returns:
+        list[str]: The sort key values.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        values = None
+
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(v, str) for v in values):
+        err = "Invalid pagination cursor"
+        raise ValueError(err)
+
+    return values
+
+
+def total_count(target: Table, mode: CountMode = "exact") -> ColumnElement[int]:
+    """Get a scalar expression for the number of rows in a table.
+
+    In ``estimate`` mode the planner statistics in ``pg_class.reltuples`` are read instead of
+    scanning the table, falling back to an exact count if the table has never been analyzed.
+
+    Args:
+        target (Table): The table to count.
+        mode (CountMode): Whether to count exactly or estimate.
+
+    Returns:
+        ColumnElement[int]: Expression that can be selected alongside other columns.
+
+    """
+    exact = select(func.count()).select_from(target).scalar_subquery()
+    if mode == "exact":
+        return exact
+
+    reltuples = (
+        select(cast(_pg_class.c.reltuples, BigInteger))
+        .where(_pg_class.c.oid == func.to_regclass(target.name))
+        .scalar_subquery()
+    )
+    return case((reltuples >= 0, reltuples), else_=exact)
+
+
+async def fetch_page(
+    db: AsyncSession, query: Select[Any], target: Table, mode: CountMode = "exact",
+) -> tuple[list[Any], int]:
+    """Fetch a page of ORM entities together with the table row count in one round trip.
+
+    Args:
+        db (AsyncSession): The session to run the query in.
+        query (Select): Query selecting a single entity, with ordering and limits applied.
+        target (Table): The table to count.
+        mode (CountMode): Whether to count exactly or estimate.
+
+    Returns:
+        tuple[list[Any], int]: The entities on the page and the total row count.
+
+    """
+    rows = (await db.execute(query.add_columns(total_count(target, mode).label("total")))).all()
+    if not rows:
+        # Nothing to attach the count to, which only happens on empty or out of range pages.
+        return [], (await db.execute(select(total_count(target, mode)))).scalar_one()
+
+    return [row[0] for row in rows], rows[0].total
@@ -1,20 +1,174 @@
 """Postgres database connection utilities."""
+import asyncio
 from collections.abc import Generator
+from time import monotonic, perf_counter
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
+from kbalyzer.logging import get_logger
 from kbalyzer.settings import settings
 
+logger = get_logger(__name__)
+
 Base = declarative_base()
 
-engine = create_async_engine(settings.postgres_uri, echo=settings.ENV == "dev") # echo=True for logging SQL queries
-AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts take, including waiting for a free connection."""
+
+    def __init__(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003
+        """Initialize class."""
+        super().__init__(*args, **kwargs)
+        self.checkout_count = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = perf_counter() - start
+            self.checkout_count += 1
+            self.checkout_seconds_total += elapsed
+            self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+
+def _create_engine(uri: str) -> AsyncEngine:
+    """Create an engine with the configured connection pool."""
+    return create_async_engine(
+        uri,
+        poolclass=InstrumentedPool,
+        pool_size=settings.POSTGRES_POOL_SIZE,
+        max_overflow=settings.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=settings.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=settings.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=settings.POSTGRES_POOL_PRE_PING,
+    )
+
+
+class ReplicaRouter:
+    """Round robin selection of read replicas that skips replicas which recently failed to connect."""
+
+    def __init__(self, engines: list[AsyncEngine], retry_seconds: float) -> None:
+        """Initialize class.
+
+        Args:
+            engines (list[AsyncEngine]): Engines of the replicas.
+            retry_seconds (float): Number of seconds a failed replica is skipped for.
+
+        """
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._down_until: dict[AsyncEngine, float] = {}
+
+    def candidates(self) -> list[AsyncEngine]:
+        """Get the replicas to try for a session, starting from the next one in turn."""
+        if not self.engines:
+            return []
+
+        start = self._next
+        self._next = (start + 1) % len(self.engines)
+        now = monotonic()
+        ordered = self.engines[start:] + self.engines[:start]
+        return [replica for replica in ordered if self._down_until.get(replica, 0.0) <= now]
+
+    def mark_down(self, replica: AsyncEngine) -> None:
+        """Skip a replica until the retry period has passed."""
+        self._down_until[replica] = monotonic() + self.retry_seconds
+
+
+engine = _create_engine(settings.postgres_uri)
+replica_engines = [_create_engine(uri) for uri in settings.POSTGRES_REPLICA_URIS]
+replica_router = ReplicaRouter(replica_engines, settings.POSTGRES_REPLICA_RETRY_SECONDS)
+# Loaded objects keep their values after commit, so routes can end a transaction (and return its
+# connection to the pool) as soon as their database work is done and still use what they read.
+AsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 async def get_db() -> Generator[AsyncSession]:
-    """Get a database session from the local connection pool."""
+    """Get a database session from the local connection pool.
+
+    The session only checks out a connection when it runs its first statement. CRUD classes depend
+    on it with ``scope="function"``, so the session is closed when the route returns rather than
+    after the response has been sent.
+    """
     db = AsyncSessionLocal()
     try:
         yield db
     finally:
         await db.close()
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """Return the connection of a session to the pool until its next statement.
+
+    Ends the current transaction, so only call it when the session has no pending changes.
+    """
+    if db.in_transaction():
+        await db.commit()
+
+
+async def open_read_session() -> AsyncSession:
+    """Open a session on the next reachable replica, or on the primary if none is reachable."""
+    for replica in replica_router.candidates():
+        db = AsyncSessionLocal(bind=replica)
+        try:
+            await db.connection()
+        except (OSError, SQLAlchemyError):
+            await db.close()
+            replica_router.mark_down(replica)
+            logger.warning(
+                "Read replica %s is unavailable, skipping it for %.0fs",
+                replica.url.render_as_string(hide_password=True),
+                replica_router.retry_seconds,
+            )
+            continue
+        return db
+    return AsyncSessionLocal()
+
+
+async def get_read_db() -> Generator[AsyncSession]:
+    """Get a database session for reads, served by a read replica when any are configured.
+
+    Replicas lag slightly behind the primary, so only use this for reads that tolerate stale data
+    and never write through it.
+    """
+    db = await open_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def warm_up_pool(count: int = settings.POSTGRES_POOL_SIZE) -> None:
+    """Open pooled connections ahead of the first requests.
+
+    Args:
+        count (int): Number of connections to open concurrently.
+
+    """
+    results = await asyncio.gather(*(engine.connect().start() for _ in range(count)), return_exceptions=True)
+    connections = [result for result in results if isinstance(result, AsyncConnection)]
+    for connection in connections:
+        await connection.close()
+
+    if len(connections) < count:
+        logger.warning("Only opened %d of %d connections while warming up the pool", len(connections), count)
+
+
+def pool_stats() -> dict[str, float]:
+    """Get live connection pool statistics."""
+    pool: InstrumentedPool = engine.pool  # type: ignore[assignment]
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "checkout_count": pool.checkout_count,
+        "checkout_seconds_total": pool.checkout_seconds_total,
+        "checkout_seconds_max": pool.checkout_seconds_max,
+    }
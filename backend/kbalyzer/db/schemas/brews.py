@@ -2,9 +2,9 @@
 from datetime import UTC, datetime
 from uuid import UUID, uuid4
 
-from sqlalchemy import String
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import UUID as PgUUID  # noqa: N811
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from kbalyzer.db.postgres import Base
 
@@ -13,6 +13,10 @@ class Brew(Base):
     """User database schema."""
 
     __tablename__ = "brew"
+    __table_args__ = (
+        Index("ix_brew_creation_date_id", "creation_date", "id"),
+        Index("ix_brew_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
     id: Mapped[UUID] = mapped_column(
         PgUUID(as_uuid=True),
         primary_key=True,
@@ -20,4 +24,50 @@ class Brew(Base):
     )
     name: Mapped[str] = mapped_column(String, unique=True)
     creation_date: Mapped[datetime] = mapped_column(default = lambda: datetime.now(UTC))
+    stats: Mapped["BrewRollup | None"] = relationship(lazy="joined", viewonly=True)
+
+
+class BrewReading(Base):
+    """Brew sensor reading database schema."""
+
+    __tablename__ = "brew_reading"
+    brew_id: Mapped[UUID] = mapped_column(
+        PgUUID(as_uuid=True),
+        ForeignKey("brew.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    recorded_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    temperature: Mapped[float | None]
+    ph: Mapped[float | None]
+    gravity: Mapped[float | None]
+
+
+class BrewRollup(Base):
+    """Running aggregates over the readings of a brew, updated as readings are ingested."""
+
+    __tablename__ = "brew_rollup"
+    brew_id: Mapped[UUID] = mapped_column(
+        PgUUID(as_uuid=True),
+        ForeignKey("brew.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    reading_count: Mapped[int] = mapped_column(default=0)
+    first_recorded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    last_recorded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    min_temperature: Mapped[float | None]
+    max_temperature: Mapped[float | None]
+    first_gravity: Mapped[float | None]
+    first_gravity_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    latest_gravity: Mapped[float | None]
+    latest_gravity_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    @property
+    def fermentation_rate(self) -> float | None:
+        """Average gravity drop per day between the first and latest gravity readings."""
+        if None in (self.first_gravity, self.first_gravity_at, self.latest_gravity, self.latest_gravity_at):
+            return None
 
+        days = (self.latest_gravity_at - self.first_gravity_at).total_seconds() / 86400
+        if days <= 0:
+            return None
+        return (self.first_gravity - self.latest_gravity) / days
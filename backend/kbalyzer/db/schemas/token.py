@@ -0,0 +1,18 @@
+"""Token database schema."""
+from datetime import UTC, datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from kbalyzer.db.postgres import Base
+
+
+class RevokedToken(Base):
+    """Revoked access token database schema."""
+
+    __tablename__ = "revoked_token"
+    jti: Mapped[str] = mapped_column(String(32), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    revoked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(UTC), index=True,
+    )
@@ -31,3 +31,4 @@ class UserSchema(Base):
     needs_password_change: Mapped[bool] = mapped_column(default=False)
     totp_enabled: Mapped[bool] = mapped_column(default=False)
     totp_secret: Mapped[str] = mapped_column(String(32), nullable=True)
+    token_version: Mapped[int] = mapped_column(default=0)
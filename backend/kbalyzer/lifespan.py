@@ -1,11 +1,15 @@
 """Kombuchalyzer FastAPI lifespan functions."""
+import asyncio
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
+from kbalyzer.auth import password_pool
+from kbalyzer.db.crud.token import sync_revocations
 from kbalyzer.db.crud.user import UserCRUD
-from kbalyzer.db.postgres import get_db
+from kbalyzer.db.notify import change_listener
+from kbalyzer.db.postgres import get_db, warm_up_pool
 from kbalyzer.models.user import UserCreate
 from kbalyzer.settings import settings
 
@@ -13,6 +17,9 @@ from kbalyzer.settings import settings
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
     """Global lifespan function for FastAPI."""
+    if settings.POSTGRES_POOL_WARMUP:
+        await warm_up_pool()
+
     async for db in get_db():
         crud = UserCRUD(db)
         with suppress(ValueError):
@@ -24,4 +31,14 @@ async def lifespan(_app: FastAPI) -> AsyncGenerator[None]:
                 ),
             )
 
+    background_tasks = [
+        asyncio.create_task(sync_revocations()),
+        asyncio.create_task(change_listener.run()),
+    ]
+
     yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    password_pool.shutdown()
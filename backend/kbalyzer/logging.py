@@ -1,14 +1,121 @@
-"""Logging module."""
+"""Logging module.
 
+Records are handed to a queue by the calling thread and written to stdout by a background
+listener thread, so logging never blocks the event loop on I/O. Handlers are configured once
+per process on the root logger and module loggers only set their level and propagate to it.
+"""
+
+import atexit
+import json
 import logging
+import random
 import sys
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from typing import Literal
+from uuid import uuid4
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from kbalyzer.settings import settings
 
-LOGGING_FORMATTER = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOGGING_FORMATTER = "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(message)s"
 DebugLevels = Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
 
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_listener: QueueListener | None = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record."""
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the id of the request being handled to records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add the request id to a record."""
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG and INFO records from high volume loggers.
+
+    Rates are keyed by logger name and also apply to child loggers, e.g. a rate of 0.1 for
+    ``sqlalchemy.engine`` keeps roughly one in ten SQL statement logs.
+    """
+
+    def __init__(self, rates: dict[str, float]) -> None:
+        """Initialize class."""
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether to keep a record."""
+        if record.levelno > logging.INFO:
+            return True
+
+        for name, rate in self.rates.items():
+            if record.name == name or record.name.startswith(f"{name}."):
+                return random.random() < rate  # noqa: S311
+        return True
+
+
+class _FormattingQueueHandler(QueueHandler):
+    """Queue handler that hands the listener a fully formatted line."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        line = self.format(record)
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = line
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+def configure_logging() -> None:
+    """Route all logging through a background listener thread, once per process."""
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        return
+
+    log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    queue_handler = _FormattingQueueHandler(log_queue)
+    queue_handler.setFormatter(
+        JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(LOGGING_FORMATTER),
+    )
+    queue_handler.addFilter(RequestIdFilter())
+    if settings.LOG_SAMPLE_RATES:
+        queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    if settings.ENV == "dev":
+        # Log SQL statements through the queue rather than the engine's own echo handler
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    _listener.start()
+    atexit.register(_listener.stop)
+
 
 def get_logger(name: str | None = None, level: DebugLevels | None = None) -> logging.Logger:
     """Configure logger with the given name and logging level.
@@ -21,14 +128,42 @@ def get_logger(name: str | None = None, level: DebugLevels | None = None) -> log
         logging.Logger: The configured logger object.
 
     """
+    configure_logging()
     logger = logging.getLogger(name=name)
-    handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter(LOGGING_FORMATTER)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
 
     if level is None:
         level = "DEBUG" if settings.ENV == "dev" else "INFO"
 
     logger.setLevel(level=level)
     return logger
+
+
+class RequestIdMiddleware:
+    """ASGI middleware giving every request an id for its log records.
+
+    The id is taken from the ``X-Request-ID`` header when present and echoed back in the response.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize class."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        current = incoming.decode("latin-1")[:128] if incoming else uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", current)
+            await send(message)
+
+        token = request_id.set(current)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
@@ -2,9 +2,13 @@
 from fastapi import FastAPI
 
 from kbalyzer.lifespan import lifespan
-from kbalyzer.logging import get_logger
+from kbalyzer.logging import RequestIdMiddleware, get_logger
+from kbalyzer.metrics import MetricsMiddleware
 from kbalyzer.models.general import Health
+from kbalyzer.profiling import QueryProfilerMiddleware
+from kbalyzer.responses import ORJSONResponse
 from kbalyzer.routes.api import router as api_router
+from kbalyzer.routes.metrics import router as metrics_router
 from kbalyzer.settings import settings
 
 logger = get_logger(__name__)
@@ -30,15 +34,24 @@ app = FastAPI(
             "name": "otp",
             "description": "Endpoints for handling OTP 2FA",
         },
+        {
+            "name": "db",
+            "description": "Admin only database monitoring endpoints",
+        },
     ],
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url=None,
     redoc_url=None,
     openapi_url=None,
 )
 logger.info("Application created")
 
+app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 app.include_router(api_router)
+app.include_router(metrics_router)
 
 if settings.ENV == "dev":
     from kbalyzer.routes.auth import nonapi_auth_router
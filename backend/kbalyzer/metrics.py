@@ -0,0 +1,142 @@
+"""Prometheus metrics for requests, database queries and in-process caches."""
+from collections.abc import Iterator
+from time import perf_counter
+from typing import Any
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.crud.analytics import brew_analytics_cache
+from kbalyzer.db.crud.brews import brew_stats_cache
+from kbalyzer.db.crud.user import principal_cache, token_version_cache
+from kbalyzer.db.postgres import engine, pool_stats, replica_engines
+from kbalyzer.routes.brews import brew_list_cache
+from kbalyzer.routes.otp import qr_code_cache
+
+SQL_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY"})
+CACHES: dict[str, TTLCache] = {
+    "principal": principal_cache,
+    "token_version": token_version_cache,
+    "brew_list": brew_list_cache,
+    "brew_stats": brew_stats_cache,
+    "brew_analytics": brew_analytics_cache,
+    "qr_code": qr_code_cache,
+}
+
+REQUEST_DURATION = Histogram(
+    "kbalyzer_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "kbalyzer_http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ["method"],
+)
+QUERY_DURATION = Histogram(
+    "kbalyzer_db_query_duration_seconds",
+    "SQL statement execution time by operation.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+QUERY_ERRORS = Counter(
+    "kbalyzer_db_query_errors_total",
+    "SQL statements that raised an error, by operation.",
+    ["operation"],
+)
+
+for _stat in ("size", "checked_in", "checked_out", "overflow", "checkout_count", "checkout_seconds_total"):
+    Gauge(f"kbalyzer_db_pool_{_stat}", f"Database connection pool {_stat.replace('_', ' ')}.").set_function(
+        lambda stat=_stat: pool_stats()[stat],
+    )
+
+_cache_size = Gauge("kbalyzer_cache_size", "In-process cache entries.", ["cache"])
+for _name, _cache in CACHES.items():
+    _cache_size.labels(_name).set_function(lambda cache=_cache: cache.stats()["size"])
+
+
+class CacheCollector(Collector):
+    """Export in-process cache hits and misses as counters, read from the caches at scrape time."""
+
+    def collect(self) -> Iterator[CounterMetricFamily]:
+        """Collect cache hit and miss counters."""
+        for stat in ("hits", "misses"):
+            counter = CounterMetricFamily(
+                f"kbalyzer_cache_{stat}", f"In-process cache {stat} since the worker started.", labels=["cache"],
+            )
+            for name, cache in CACHES.items():
+                counter.add_metric([name], cache.stats()[stat])
+            yield counter
+
+
+REGISTRY.register(CacheCollector())
+
+
+def _operation(statement: str) -> str:
+    """Get a bounded label for the kind of SQL statement."""
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in SQL_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn: Connection, *_args: Any) -> None:  # noqa: ANN401
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, _cursor: Any, statement: str, *_args: Any) -> None:  # noqa: ANN401
+    QUERY_DURATION.labels(_operation(statement)).observe(perf_counter() - conn.info["query_start"].pop())
+
+
+def _handle_error(context: Any) -> None:  # noqa: ANN401
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+    QUERY_ERRORS.labels(_operation(context.statement or "")).inc()
+
+
+for _engine in (engine, *replica_engines):
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(_engine.sync_engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and in-flight requests.
+
+    Requests are labelled with the matched route template rather than the raw path so that path
+    parameters do not create a new time series per value.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize class."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                method, getattr(route, "path_format", "unmatched"), str(status_code),
+            ).observe(perf_counter() - start)
@@ -1,4 +1,6 @@
 """Pydantic models for Kombuchalyzer auth endpoints."""
+from uuid import UUID
+
 from pydantic import BaseModel
 
 
@@ -17,3 +19,10 @@ class OTPSubmission(BaseModel): # noqa: D101
 
 class OTPFlowSubmission(OTPSubmission): # noqa: D101
     access_token: str
+
+
+class TokenPrincipal(BaseModel): # noqa: D101
+    id: UUID
+    email: str
+    role: str
+    token_version: int
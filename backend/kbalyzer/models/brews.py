@@ -1,16 +1,130 @@
 """User interaction models."""
-from datetime import datetime
+from datetime import UTC, datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from kbalyzer.db.pagination import CountMode
+
+MAX_READINGS_PER_BATCH = 10_000
+
+ExportFormat = Literal["ndjson", "csv"]
+ExportResource = Literal["brews", "readings"]
+
+
+class BrewStats(BaseModel):  # noqa: D101
+    model_config = ConfigDict(from_attributes=True)
+    reading_count: int
+    first_recorded_at: datetime | None
+    last_recorded_at: datetime | None
+    min_temperature: float | None
+    max_temperature: float | None
+    first_gravity: float | None
+    latest_gravity: float | None
+    fermentation_rate: float | None
 
 
 class BrewView(BaseModel):  # noqa: D101
+    model_config = ConfigDict(from_attributes=True)
     id: UUID
     name: str
     creation_date: datetime
+    stats: BrewStats | None = None
+
+
+class BrewListQuery(BaseModel): # noqa: D101
+    model_config = ConfigDict(frozen=True)
+    skip: int = 0
+    limit: int = 100
+    cursor: str | None = None
+    count: CountMode = "exact"
 
 
 class BrewAllResponse(BaseModel): # noqa: D101
     total: int
     brews: list[BrewView]
+    next_cursor: str | None = None
+
+
+class BrewSearchMatch(BrewView): # noqa: D101
+    score: float
+
+
+class BrewSearchResponse(BaseModel): # noqa: D101
+    brews: list[BrewSearchMatch]
+
+
+class ReadingCreate(BaseModel): # noqa: D101
+    recorded_at: datetime
+    temperature: float | None = None
+    ph: float | None = None
+    gravity: float | None = None
+
+    @field_validator("recorded_at")
+    @classmethod
+    def recorded_at_in_utc(cls, value: datetime) -> datetime:
+        """Take naive timestamps as UTC and convert aware ones to UTC."""
+        return value.replace(tzinfo=UTC) if value.tzinfo is None else value.astimezone(UTC)
+
+
+class ReadingBatch(BaseModel): # noqa: D101
+    readings: list[ReadingCreate] = Field(min_length=1, max_length=MAX_READINGS_PER_BATCH)
+
+
+class ReadingIngestResponse(BaseModel): # noqa: D101
+    received: int
+    inserted: int
+
+
+class ReadingStats(BaseModel): # noqa: D101
+    min: float
+    max: float
+    mean: float
+
+
+class ReadingBucket(BaseModel): # noqa: D101
+    start: datetime
+    count: int
+    temperature: ReadingStats | None
+    ph: ReadingStats | None
+    gravity: ReadingStats | None
+
+
+class ReadingSeries(BaseModel): # noqa: D101
+    brew_id: UUID
+    start: datetime | None
+    end: datetime | None
+    bucket_seconds: float
+    buckets: list[ReadingBucket]
+
+
+class BrewAnalytics(BaseModel): # noqa: D101
+    brew_id: UUID
+    reading_count: int
+    original_gravity: float | None
+    final_gravity: float | None
+    abv: float | None
+    fermentation_rate: float | None
+    rate_curve: list[float | None]
+    hours_to_target_ph: float | None
+
+
+class BrewAnalyticsAverage(BaseModel): # noqa: D101
+    brew_count: int
+    abv: float | None
+    fermentation_rate: float | None
+    rate_curve: list[float | None]
+    hours_to_target_ph: float | None
+
+
+class BrewAnalyticsComparison(BrewAnalytics): # noqa: D101
+    abv_difference: float | None
+    fermentation_rate_difference: float | None
+    hours_to_target_ph_difference: float | None
+
+
+class BrewAnalyticsResponse(BaseModel): # noqa: D101
+    target_ph: float
+    average: BrewAnalyticsAverage
+    brews: list[BrewAnalyticsComparison]
@@ -6,3 +6,13 @@ from pydantic import BaseModel
 
 class Health(BaseModel): # noqa: D101
     message: Literal["OK"]
+
+
+class PoolStats(BaseModel): # noqa: D101
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkout_count: int
+    checkout_seconds_total: float
+    checkout_seconds_max: float
@@ -1,7 +1,10 @@
 """User interaction models."""
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_USERS_PER_BATCH = 500
 
 
 class UserBase(BaseModel): # noqa: D101
@@ -28,3 +31,19 @@ class UserCreate(UserBase): # noqa: D101
 class UserAllResponse(BaseModel): # noqa: D101
     total: int
     users: list[UserAdminView]
+    next_cursor: str | None = None
+
+
+class UserBulkCreate(BaseModel): # noqa: D101
+    users: list[UserCreate] = Field(min_length=1, max_length=MAX_USERS_PER_BATCH)
+
+
+class UserBulkResult(BaseModel): # noqa: D101
+    email: str
+    status: Literal["created", "exists"]
+    user: UserAdminView | None = None
+
+
+class UserBulkCreateResponse(BaseModel): # noqa: D101
+    created: int
+    results: list[UserBulkResult]
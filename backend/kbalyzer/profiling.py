@@ -0,0 +1,146 @@
+"""Per-request SQL query profiling."""
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from kbalyzer.db.postgres import engine, replica_engines
+from kbalyzer.logging import get_logger
+from kbalyzer.settings import settings
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class QueryProfile:
+    """SQL statements run while handling a single request."""
+
+    route: str = ""
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Get statements run at least ``threshold`` times, which usually points at an N+1 query."""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current_profile: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+_observers: list[Callable[[QueryProfile], None]] = []
+
+
+def _before_cursor_execute(conn: Connection, *_args: Any) -> None:  # noqa: ANN401
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, _cursor: Any, statement: str, *_args: Any) -> None:  # noqa: ANN401
+    profile = _current_profile.get()
+    if profile is None or not conn.info.get("profile_start"):
+        return
+
+    profile.count += 1
+    profile.seconds += perf_counter() - conn.info["profile_start"].pop()
+    profile.statements[statement] += 1
+
+
+def _handle_error(context: Any) -> None:  # noqa: ANN401
+    if context.connection is not None and context.connection.info.get("profile_start"):
+        context.connection.info["profile_start"].pop()
+
+
+for _engine in (engine, *replica_engines):
+    event.listen(_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(_engine.sync_engine, "handle_error", _handle_error)
+
+
+class QueryProfilerMiddleware:
+    """ASGI middleware counting and timing the SQL statements each request runs.
+
+    The totals are reported in a ``Server-Timing`` header, and requests going over the
+    ``QUERY_BUDGET_COUNT`` or ``QUERY_BUDGET_SECONDS`` budget or repeating a statement
+    ``QUERY_REPEAT_THRESHOLD`` times are logged.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Initialize class."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Handle an ASGI call."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile()
+        token = _current_profile.set(profile)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", f'db;dur={profile.seconds * 1000:.3f};desc="{profile.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            route = scope.get("route")
+            profile.route = getattr(route, "path_format", scope["path"])
+            self._report(scope["method"], profile)
+
+    @staticmethod
+    def _report(method: str, profile: QueryProfile) -> None:
+        if profile.count > settings.QUERY_BUDGET_COUNT or profile.seconds > settings.QUERY_BUDGET_SECONDS:
+            logger.warning(
+                "%s %s ran %d queries in %.3fs, over the budget of %d queries or %.3fs",
+                method, profile.route, profile.count, profile.seconds,
+                settings.QUERY_BUDGET_COUNT, settings.QUERY_BUDGET_SECONDS,
+            )
+        for statement, count in profile.repeated(settings.QUERY_REPEAT_THRESHOLD):
+            logger.warning(
+                "%s %s ran the same query %d times, possible N+1: %s", method, profile.route, count, statement,
+            )
+        for observer in _observers:
+            observer(profile)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[list[QueryProfile]]:
+    """Assert that every request handled inside the block runs at most ``limit`` queries.
+
+    Intended for tests driving the application, for example through ``TestClient``::
+
+        with assert_max_queries(2):
+            client.get("/api/admin/user/all")
+
+    Yields:
+        list[QueryProfile]: Profiles of the requests handled so far.
+
+    Raises:
+        AssertionError: If a request ran more than ``limit`` queries.
+
+    """
+    profiles: list[QueryProfile] = []
+    _observers.append(profiles.append)
+    try:
+        yield profiles
+    finally:
+        _observers.remove(profiles.append)
+
+    over_budget = [profile for profile in profiles if profile.count > limit]
+    if over_budget:
+        details = ", ".join(f"{profile.route} ran {profile.count}" for profile in over_budget)
+        err = f"Expected at most {limit} queries per request: {details}"
+        raise AssertionError(err)
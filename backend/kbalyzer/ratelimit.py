@@ -0,0 +1,130 @@
+"""Token bucket rate limiting."""
+from collections import OrderedDict
+from time import monotonic
+from typing import Protocol
+
+from fastapi import HTTPException, Request, status
+
+from kbalyzer.settings import settings
+
+
+class RateLimitStore(Protocol):
+    """Storage for token buckets.
+
+    Implementations must apply the refill and consume of a bucket atomically, so a store shared
+    between workers (e.g. backed by Redis or Postgres) can be swapped in for the local one.
+    """
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        """Take a token from the bucket of a key.
+
+        Args:
+            key (str): The bucket to take a token from.
+            rate (float): Tokens added to the bucket per second.
+            burst (int): Bucket capacity.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+
+        """
+        ...
+
+
+class MemoryRateLimitStore:
+    """Token buckets kept in process memory.
+
+    Each key costs a fixed size entry, and the least recently used keys are evicted once
+    ``max_keys`` is reached. An evicted key simply starts again with a full bucket.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        """Initialize class."""
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        """Take a token from the bucket of a key."""
+        now = monotonic()
+        tokens, updated = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RateLimiter:
+    """Rate limit keyed actions with token buckets."""
+
+    def __init__(self, store: RateLimitStore, name: str, per_minute: float, burst: int) -> None:
+        """Initialize class.
+
+        Args:
+            store (RateLimitStore): Where buckets are kept.
+            name (str): Namespace of this limiter's keys in the store.
+            per_minute (float): Sustained number of allowed actions per minute.
+            burst (int): Number of actions allowed at once.
+
+        """
+        self.store = store
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    async def hit(self, key: str) -> None:
+        """Record an action for a key.
+
+        Raises:
+            HTTPException: 429 if the key is over its limit.
+
+        """
+        retry_after = await self.store.consume(f"{self.name}:{key}", self.rate, self.burst)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+
+
+rate_limit_store: RateLimitStore = MemoryRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+login_ip_limiter = RateLimiter(
+    rate_limit_store, "login-ip", settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE, settings.LOGIN_RATE_LIMIT_IP_BURST,
+)
+login_account_limiter = RateLimiter(
+    rate_limit_store,
+    "login-account",
+    settings.LOGIN_RATE_LIMIT_ACCOUNT_PER_MINUTE,
+    settings.LOGIN_RATE_LIMIT_ACCOUNT_BURST,
+)
+
+
+def client_ip(request: Request) -> str:
+    """Get the address of the client, trusting X-Forwarded-For only if configured to.
+
+    Every proxy appends the address it received the request from, and clients can send the header
+    with any entries already in it. Only the entries added by the ``RATE_LIMIT_FORWARDED_HOPS``
+    trusted proxies are reliable, so the address is taken that many entries from the right.
+    """
+    hops = settings.RATE_LIMIT_FORWARDED_HOPS
+    if settings.RATE_LIMIT_TRUST_FORWARDED and hops > 0:
+        forwarded = [
+            entry.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for entry in header.split(",")
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+async def limit_login_by_ip(request: Request) -> None:
+    """Reject login attempts from clients over the per address limit."""
+    await login_ip_limiter.hit(client_ip(request))
@@ -0,0 +1,22 @@
+"""Kombuchalyzer response classes."""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Pydantic models passed in directly are serialized by pydantic without being validated again,
+    so routes can return an already validated model without FastAPI rebuilding it against the
+    route's response model. Such routes declare ``response_model`` on the decorator to keep the
+    OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:  # noqa: ANN401
+        """Render content to JSON bytes."""
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
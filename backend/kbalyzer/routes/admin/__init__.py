@@ -1,9 +1,11 @@
 """Admin API routes."""
 from fastapi import APIRouter
 
+from kbalyzer.routes.admin.db import router as db_router
 from kbalyzer.routes.admin.user import router as user_router
 
 router = APIRouter(
     prefix="/admin",
 )
 router.include_router(user_router)
+router.include_router(db_router)
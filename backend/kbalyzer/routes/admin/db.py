@@ -0,0 +1,22 @@
+"""Admin only database API routes."""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from kbalyzer.db.crud.user import get_token_admin_user
+from kbalyzer.db.postgres import pool_stats
+from kbalyzer.models.auth import TokenPrincipal
+from kbalyzer.models.general import PoolStats
+
+router = APIRouter(
+    prefix="/db",
+    tags=["db"],
+)
+
+
+@router.get("/pool")
+async def get_pool_stats(
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+) -> PoolStats:
+    """Get live database connection pool statistics."""
+    return PoolStats(**pool_stats())
@@ -4,8 +4,18 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from kbalyzer.db.crud.user import UserCRUD, get_current_admin_user
-from kbalyzer.models.user import UserAdminView, UserAllResponse, UserCreate
+from kbalyzer.db.crud.user import UserCRUD, UserReadCRUD, get_token_admin_user
+from kbalyzer.db.pagination import CountMode
+from kbalyzer.models.auth import TokenPrincipal
+from kbalyzer.models.user import (
+    UserAdminView,
+    UserAllResponse,
+    UserBulkCreate,
+    UserBulkCreateResponse,
+    UserBulkResult,
+    UserCreate,
+)
+from kbalyzer.responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/user",
@@ -13,13 +23,13 @@ router = APIRouter(
 )
 
 
-@router.get("/")
+@router.get("/", response_model=UserAdminView)
 async def get_user(
-    user_crud: Annotated[UserCRUD, Depends()],
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    user_crud: Annotated[UserReadCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
     user_email: str | None = None,
     user_id: UUID | None = None,
-) -> UserAdminView:
+) -> ORJSONResponse:
     """Get all users."""
     if user_id is None and user_email is None:
         raise HTTPException(status_code=400, detail="Either id or email must be provided")
@@ -29,52 +39,85 @@ async def get_user(
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        return UserAdminView(**user.__dict__)
+        return ORJSONResponse(UserAdminView.model_validate(user))
 
     user = await user_crud.get_user_by_email(user_email) # type: ignore # noqa: PGH003
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return UserAdminView(**user.__dict__)
+    return ORJSONResponse(UserAdminView.model_validate(user))
 
 
-@router.get("/all")
+@router.get("/all", response_model=UserAllResponse)
 async def get_all_users(
-    user_crud: Annotated[UserCRUD, Depends()],
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    user_crud: Annotated[UserReadCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
     skip: int = 0,
     limit: int = 100,
-) -> UserAllResponse:
-    """Get all users."""
-    users = await user_crud.get_users(skip, limit)
-    count = await user_crud.user_count()
-    return UserAllResponse(
-        users=[UserAdminView(**user.__dict__) for user in users],
-        total=count,
-    )
+    cursor: str | None = None,
+    count: CountMode = "exact",
+) -> ORJSONResponse:
+    """Get all users.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the following page without scanning skipped rows.
+    Use `count=estimate` to report the total from planner statistics instead of counting every row.
+    """
+    if cursor is not None and skip:
+        raise HTTPException(status_code=400, detail="Cannot combine skip with cursor")
 
+    try:
+        users, total = await user_crud.get_users_page(skip, limit, cursor, count)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+    return ORJSONResponse(UserAllResponse(
+        users=[UserAdminView.model_validate(user) for user in users],
+        total=total,
+        next_cursor=user_crud.user_cursor(users[-1]) if users and len(users) == limit else None,
+    ))
 
-@router.post("/")
+
+@router.post("/", response_model=UserAdminView)
 async def create_user(
     user_crud: Annotated[UserCRUD, Depends()],
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
     user_create: UserCreate,
-) -> UserAdminView:
+) -> ORJSONResponse:
     """Get all users."""
     try:
         created = await user_crud.create_user(user_create)
     except ValueError:
         raise HTTPException(status_code=400, detail="User already exists") from None
 
-    return UserAdminView(**created.__dict__)
+    return ORJSONResponse(UserAdminView.model_validate(created))
 
 
-@router.delete("/{user_id}")
+@router.post("/bulk", response_model=UserBulkCreateResponse)
+async def create_users(
+    user_crud: Annotated[UserCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    bulk_create: UserBulkCreate,
+) -> ORJSONResponse:
+    """Create many users at once, reporting for each whether it was created or already existed."""
+    created = await user_crud.create_users(bulk_create.users)
+    results = [
+        UserBulkResult(email=user.email, status="created", user=UserAdminView.model_validate(db_user))
+        if db_user is not None
+        else UserBulkResult(email=user.email, status="exists")
+        for user, db_user in zip(bulk_create.users, created, strict=True)
+    ]
+    return ORJSONResponse(UserBulkCreateResponse(
+        created=sum(result.status == "created" for result in results),
+        results=results,
+    ))
+
+
+@router.delete("/{user_id}", response_model=UserAdminView)
 async def delete_user(
     user_crud: Annotated[UserCRUD, Depends()],
-    admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
     user_id: UUID,
-) -> UserAdminView:
+) -> ORJSONResponse:
     """Delete user."""
     if admin_user.id == user_id:
         raise HTTPException(status_code=400, detail="Admin users cannot delete themselves")
@@ -84,4 +127,4 @@ async def delete_user(
     except ValueError:
         raise HTTPException(status_code=404, detail="User not found") from None
 
-    return UserAdminView(**deleted.__dict__)
+    return ORJSONResponse(UserAdminView.model_validate(deleted))
@@ -1,18 +1,21 @@
 """Auth API endpoints."""
-from datetime import timedelta
+from datetime import UTC, datetime, timedelta
 from typing import Annotated
 
 import jwt
 import pyotp
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
-from kbalyzer.auth import create_access_token
-from kbalyzer.db.crud.user import UserCRUD, get_current_user
+from kbalyzer.auth import create_access_token, oauth2_scheme
+from kbalyzer.db.crud.token import TokenCRUD
+from kbalyzer.db.crud.user import UserCRUD, access_token_claims, get_current_user
 from kbalyzer.db.schemas.user import UserSchema
 from kbalyzer.models.auth import LogoutDetails, OTPFlowSubmission, Token
 from kbalyzer.models.user import UserAdminView
+from kbalyzer.ratelimit import limit_login_by_ip, login_account_limiter
+from kbalyzer.responses import ORJSONResponse
 from kbalyzer.routes.otp import router as otp_router
 from kbalyzer.settings import settings
 
@@ -22,13 +25,14 @@ router = APIRouter(
 
 router.include_router(otp_router)
 
-@router.post("/token", tags=["auth"])
+@router.post("/token", tags=["auth"], dependencies=[Depends(limit_login_by_ip)])
 async def login_for_access_token(
     response: Response,
     user_crud: Annotated[UserCRUD, Depends()],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """Login user and return access token."""
+    await login_account_limiter.hit(form_data.username.lower())
     user = await user_crud.authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -38,7 +42,7 @@ async def login_for_access_token(
         )
     if user.totp_enabled:
         totp_verification_token = create_access_token(
-            subject=user.email, expires_delta=timedelta(minutes=5),
+            subject=user.email, expires_delta=timedelta(minutes=5), claims={"typ": "totp"},
         )
         return Token(
             access_token=totp_verification_token, token_type="totp", # noqa: S106
@@ -46,21 +50,31 @@ async def login_for_access_token(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.email, expires_delta=access_token_expires,
+        subject=user.email, expires_delta=access_token_expires, claims=access_token_claims(user),
     )
     response.set_cookie(key="access_token", value=access_token, httponly=True)
     return Token(access_token=access_token, token_type="bearer") # noqa: S106
 
 
-@router.post("/token-2fa", tags=["auth"])
+@router.post("/token-2fa", tags=["auth"], dependencies=[Depends(limit_login_by_ip)])
 async def login_for_access_token_with_2fa(
     response: Response,
     token: OTPFlowSubmission,
     user_crud: Annotated[UserCRUD, Depends()],
 ) -> Token:
     """Post login user with 2FA and return access token."""
-    payload = jwt.decode(token.access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    try:
+        payload = jwt.decode(token.access_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.InvalidTokenError:
+        payload = {}
     email = payload.get("sub")
+    if email is None or payload.get("typ") != "totp":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid 2FA flow token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    await login_account_limiter.hit(str(email).lower())
     user = await user_crud.get_user_by_email(email)
     if not user:
         raise HTTPException(
@@ -78,23 +92,35 @@ async def login_for_access_token_with_2fa(
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        subject=user.email, expires_delta=access_token_expires,
+        subject=user.email, expires_delta=access_token_expires, claims=access_token_claims(user),
     )
     response.set_cookie(key="access_token", value=access_token, httponly=True)
     return Token(access_token=access_token, token_type="bearer") # noqa: S106
 
 
-@router.get("/me", tags=["auth"])
+@router.get("/me", tags=["auth"], response_model=UserAdminView)
 async def get_current_user_info(
     current_user: Annotated[UserSchema, Depends(get_current_user)],
-) -> UserAdminView:
+) -> ORJSONResponse:
     """Get current authenticated user information."""
-    return UserAdminView(**current_user.__dict__)
+    return ORJSONResponse(UserAdminView.model_validate(current_user))
 
 
 @router.post("/logout", tags=["auth"])
-async def logout(response: Response) -> LogoutDetails:
-    """Logout user."""
+async def logout(
+    response: Response,
+    token_crud: Annotated[TokenCRUD, Depends()],
+    token: Annotated[str | None, Depends(oauth2_scheme)] = None,
+    access_token: Annotated[str | None, Cookie()] = None,
+) -> LogoutDetails:
+    """Logout user and revoke the access tokens sent with the request."""
+    for revoked in {token, access_token} - {None}:
+        try:
+            payload = jwt.decode(revoked, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except jwt.InvalidTokenError:
+            continue
+        if "jti" in payload:
+            await token_crud.revoke_token(payload["jti"], datetime.fromtimestamp(payload["exp"], UTC))
     response.delete_cookie(key="access_token")
     return LogoutDetails(message="Successfully logged out")
 
@@ -1,26 +1,296 @@
 """Brew API endpoints."""
-from typing import Annotated
+import asyncio
+import csv
+import hashlib
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime
+from typing import Annotated, Any
+from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
 
-from kbalyzer.db.crud.brews import BrewCRUD
-from kbalyzer.db.crud.user import get_current_admin_user
-from kbalyzer.models.brews import BrewAllResponse
-from kbalyzer.models.user import UserAdminView
+from kbalyzer.broadcast import Subscription, broadcaster
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.crud.analytics import (
+    BrewAnalyticsCRUD,
+    average_analytics,
+    brew_analytics_cache,
+    compare_analytics,
+)
+from kbalyzer.db.crud.brews import BrewCRUD, BrewReadCRUD, BrewStreamCRUD, brew_stats_cache
+from kbalyzer.db.crud.user import UserCRUD, get_token_admin_user, get_token_principal
+from kbalyzer.db.notify import BREW_CHANGED_CHANNEL, change_listener
+from kbalyzer.db.postgres import release_connection
+from kbalyzer.models.auth import TokenPrincipal
+from kbalyzer.models.brews import (
+    BrewAllResponse,
+    BrewAnalyticsResponse,
+    BrewListQuery,
+    BrewSearchMatch,
+    BrewSearchResponse,
+    BrewView,
+    ExportFormat,
+    ExportResource,
+    ReadingBatch,
+    ReadingIngestResponse,
+    ReadingSeries,
+)
+from kbalyzer.responses import ORJSONResponse
+from kbalyzer.settings import settings
 
 router = APIRouter(
     prefix="/brews",
 )
 
-@router.get("/", tags=["brews"])
+# Brew listings without stats keyed by query parameters. Entries are dropped on every brew write
+# through the brew change notification, on every worker. Stats are cached per brew instead, so
+# ingesting readings only drops the stats of that brew rather than every listing.
+brew_list_cache: TTLCache[BrewListQuery, BrewAllResponse] = TTLCache(
+    max_size=settings.BREW_LIST_CACHE_MAX_SIZE,
+    ttl=settings.BREW_LIST_CACHE_TTL_SECONDS,
+)
+change_listener.subscribe(BREW_CHANGED_CHANNEL, lambda _payload: brew_list_cache.clear())
+
+MAX_SUBSCRIBED_BREWS = 50
+
+EXPORT_MEDIA_TYPES: dict[ExportFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def brew_topic(brew_id: UUID) -> str:
+    """Get the broadcast topic of live events for a brew."""
+    return f"brew:{brew_id}"
+
+
+def _export_value(value: Any) -> Any:  # noqa: ANN401
+    """Convert a column value into a JSON and CSV friendly value."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def _encode_rows(partitions: AsyncIterator[Sequence[Row]], fmt: ExportFormat) -> AsyncIterator[str]:
+    """Encode batches of rows into NDJSON or CSV chunks, one chunk per batch."""
+    header_written = False
+    async for partition in partitions:
+        if fmt == "ndjson":
+            yield "".join(
+                json.dumps({key: _export_value(value) for key, value in row._mapping.items()}) + "\n"  # noqa: SLF001
+                for row in partition
+            )
+            continue
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written and partition:
+            writer.writerow(partition[0]._fields)
+            header_written = True
+        writer.writerows([_export_value(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+
+@router.get("/", tags=["brews"], response_model=BrewAllResponse)
 async def get_brews(
     brew_crud: Annotated[BrewCRUD, Depends()],
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
-    skip: int = 0,
-    limit: int = 100,
-) -> BrewAllResponse:
-    """Get list of brews."""
-    return BrewAllResponse(
-        total = await brew_crud.brew_count(),
-        brews = list(await brew_crud.get_brews(skip=skip, limit=limit)),
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    query: Annotated[BrewListQuery, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get list of brews.
+
+    Pass the returned `next_cursor` as `cursor` to fetch the following page without scanning skipped rows.
+    Use `count=estimate` to report the total from planner statistics instead of counting every row.
+    Responses carry an `ETag`; send it back in `If-None-Match` to get a 304 when nothing changed.
+    """
+    if query.cursor is not None and query.skip:
+        raise HTTPException(status_code=400, detail="Cannot combine skip with cursor")
+
+    # Served from the primary: a replica may not have caught up yet when a change notification
+    # clears the cache, and the listing would then be cached stale until the next brew write.
+    page = brew_list_cache.get(query) if change_listener.connected else None
+    if page is None:
+        generation = brew_list_cache.generation
+        try:
+            brews, total = await brew_crud.get_brews_page(**query.model_dump())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+        page = BrewAllResponse(
+            total = total,
+            brews = [BrewView.model_validate(brew) for brew in brews],
+            next_cursor = brew_crud.brew_cursor(brews[-1]) if brews and len(brews) == query.limit else None,
+        )
+        if change_listener.connected and brew_list_cache.generation == generation:
+            brew_list_cache.set(query, page)
+
+    stats = await brew_crud.get_brew_stats([brew.id for brew in page.brews])
+    body = ORJSONResponse(page.model_copy(update={
+        "brews": [brew.model_copy(update={"stats": stats.get(brew.id)}) for brew in page.brews],
+    })).body
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/search", tags=["brews"], response_model=BrewSearchResponse)
+async def search_brews(
+    brew_crud: Annotated[BrewReadCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    q: Annotated[str, Query(min_length=3, max_length=100)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> ORJSONResponse:
+    """Search brews by partial or misspelled name, best matches first."""
+    matches = await brew_crud.search_brews(q, limit=limit)
+    return ORJSONResponse(BrewSearchResponse(brews=[
+        BrewSearchMatch(**BrewView.model_validate(brew).model_dump(), score=score)
+        for brew, score in matches
+    ]))
+
+
+@router.get("/analytics", tags=["brews"], response_model=BrewAnalyticsResponse)
+async def get_brew_analytics(
+    analytics_crud: Annotated[BrewAnalyticsCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    brew_id: Annotated[list[UUID] | None, Query()] = None,
+) -> ORJSONResponse:
+    """Get fermentation analytics of brews compared against the average brew.
+
+    Every brew with readings makes up the average and is returned unless `brew_id` selects some of them.
+    Rate curves hold the gravity drop per day over equal slots of the time between the first and last
+    gravity reading. Time to target pH counts from the first reading up to `BREW_ANALYTICS_TARGET_PH`.
+    """
+    analytics = await analytics_crud.get_analytics(await analytics_crud.get_analyzed_brew_ids())
+    average = average_analytics(analytics)
+    if brew_id is not None:
+        selected = set(brew_id)
+        analytics = [brew for brew in analytics if brew.brew_id in selected]
+
+    return ORJSONResponse(BrewAnalyticsResponse(
+        target_ph=settings.BREW_ANALYTICS_TARGET_PH,
+        average=average,
+        brews=compare_analytics(analytics, average),
+    ))
+
+
+@router.get("/export", tags=["brews"])
+async def export_brews(
+    brew_crud: Annotated[BrewStreamCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    resource: ExportResource = "brews",
+    fmt: Annotated[ExportFormat, Query(alias="format")] = "ndjson",
+    brew_id: UUID | None = None,
+) -> StreamingResponse:
+    """Export all brews or readings as NDJSON or CSV.
+
+    Rows are streamed from a server side cursor in batches, so memory use does not grow with the export size.
+    `brew_id` limits a readings export to a single brew.
+    """
+    partitions = brew_crud.stream_brews() if resource == "brews" else brew_crud.stream_readings(brew_id)
+    return StreamingResponse(
+        _encode_rows(partitions, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{fmt}"'},
     )
+
+
+@router.post("/{brew_id}/readings", tags=["brews"])
+async def add_readings(
+    brew_crud: Annotated[BrewCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    brew_id: UUID,
+    batch: ReadingBatch,
+) -> ReadingIngestResponse:
+    """Ingest a batch of sensor readings for a brew.
+
+    Readings already stored for the same timestamp are skipped, so a failed batch can be resent as is.
+    """
+    if await brew_crud.get_brew(brew_id) is None:
+        raise HTTPException(status_code=404, detail="Brew not found")
+
+    inserted = await brew_crud.add_readings(brew_id, batch.readings)
+    if inserted:
+        # Other workers drop them on the readings notification, this one should not wait for it.
+        brew_analytics_cache.invalidate(brew_id)
+        brew_stats_cache.invalidate(brew_id)
+        latest = max(batch.readings, key=lambda reading: reading.recorded_at)
+        await broadcaster.publish(brew_topic(brew_id), {
+            "type": "readings",
+            "brew_id": str(brew_id),
+            "inserted": inserted,
+            "latest": latest.model_dump(mode="json"),
+        })
+    return ReadingIngestResponse(received=len(batch.readings), inserted=inserted)
+
+
+@router.get("/{brew_id}/readings", tags=["brews"])
+async def get_readings(
+    brew_crud: Annotated[BrewReadCRUD, Depends()],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
+    brew_id: UUID,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    points: Annotated[int, Query(ge=1, le=5000)] = 500,
+) -> ReadingSeries:
+    """Get brew readings downsampled to at most `points` time buckets.
+
+    The range defaults to the first and last reading of the brew.
+    """
+    if await brew_crud.get_brew(brew_id) is None:
+        raise HTTPException(status_code=404, detail="Brew not found")
+
+    return await brew_crud.get_reading_series(brew_id, start=start, end=end, points=points)
+
+
+async def _send_events(websocket: WebSocket, subscription: Subscription) -> None:
+    async for message in subscription:
+        await websocket.send_text(message)
+
+
+async def _ignore_messages(websocket: WebSocket) -> None:
+    """Read and discard client messages until the client disconnects."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/subscribe")
+async def subscribe_brews(
+    websocket: WebSocket,
+    user_crud: Annotated[UserCRUD, Depends()],
+    brew_id: Annotated[list[UUID], Query(min_length=1, max_length=MAX_SUBSCRIBED_BREWS)],
+) -> None:
+    """Push live events of the given brews, such as new readings, as JSON messages.
+
+    Authenticates with the `access_token` cookie or a `token` query parameter. Clients that fall
+    `BROADCAST_SUBSCRIBER_BUFFER` messages behind are disconnected with code 1013 and should reconnect.
+    """
+    try:
+        principal = await get_token_principal(
+            user_crud, websocket.query_params.get("token"), websocket.cookies.get("access_token"),
+        )
+    except HTTPException:
+        principal = None
+    await release_connection(user_crud.db)
+    if principal is None or principal.role != "admin":
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    with broadcaster.subscribe(brew_topic(brew) for brew in brew_id) as subscription:
+        sender = asyncio.create_task(_send_events(websocket, subscription))
+        receiver = asyncio.create_task(_ignore_messages(websocket))
+        _, pending = await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+
+    if subscription.dropped:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Subscriber fell behind")
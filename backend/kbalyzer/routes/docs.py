@@ -5,14 +5,14 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.responses import HTMLResponse
 
-from kbalyzer.db.crud.user import get_current_admin_user
-from kbalyzer.models.user import UserAdminView
+from kbalyzer.db.crud.user import get_token_admin_user
+from kbalyzer.models.auth import TokenPrincipal
 
 router = APIRouter()
 
 @router.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html(
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
 ) -> HTMLResponse:
     """Get custom swagger UI HTML."""
     return get_swagger_ui_html(openapi_url="/api/openapi.json", title="Kombuchalyzer")
@@ -21,7 +21,7 @@ async def custom_swagger_ui_html(
 @router.get("/openapi.json", include_in_schema=False)
 async def get_openapi_json(
     request: Request,
-    _admin_user: Annotated[UserAdminView, Depends(get_current_admin_user)],
+    _admin_user: Annotated[TokenPrincipal, Depends(get_token_admin_user)],
 ) -> HTMLResponse:
     """Get OpenAPI JSON."""
     return request.app.openapi()
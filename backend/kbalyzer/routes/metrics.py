@@ -0,0 +1,28 @@
+"""Prometheus metrics endpoint."""
+import hmac
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from kbalyzer.settings import settings
+
+router = APIRouter(
+    tags=["general"],
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Annotated[str | None, Header()] = None) -> Response:
+    """Get Prometheus metrics.
+
+    The endpoint is disabled unless `METRICS_TOKEN` is set, and scrapers must send it as a bearer token.
+    """
+    if settings.METRICS_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if authorization is None or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -5,8 +5,10 @@ from typing import Annotated
 import pyotp
 import qrcode
 from fastapi import APIRouter, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 
-from kbalyzer.db.crud.user import UserCRUD, get_current_user
+from kbalyzer.cache import TTLCache
+from kbalyzer.db.crud.user import UserCRUD, get_current_user_uncached
 from kbalyzer.db.schemas.user import UserSchema
 from kbalyzer.models.auth import OTPSubmission
 
@@ -15,25 +17,38 @@ router = APIRouter(
     tags=["otp"],
 )
 
+# Rendered provisioning QR codes keyed by (secret, email)
+qr_code_cache: TTLCache[tuple[str, str], bytes] = TTLCache(max_size=128, ttl=15 * 60)
+
+
+def render_qr_code(data: str) -> bytes:
+    """Render data as a PNG QR code."""
+    img_byte_arr = io.BytesIO()
+    qrcode.make(data).save(stream=img_byte_arr, format="PNG")
+    return img_byte_arr.getvalue()
+
 
 @router.get("/generate")
 async def generate_qr_code(
     user_crud: Annotated[UserCRUD, Depends(UserCRUD)],
-    user: Annotated[UserSchema, Depends(get_current_user)],
+    user: Annotated[UserSchema, Depends(get_current_user_uncached)],
 ) -> Response:
     """Generate QR code for TOTP."""
     if user.totp_enabled:
         return Response(status_code=400, content="TOTP is already enabled for this user.")
 
-    totp_secret = pyotp.random_base32() if not user.totp_secret else user.totp_secret
-    user = await user_crud.update_user(user, totp_secret=totp_secret)
-    totp = pyotp.TOTP(totp_secret)
-    qr_code = qrcode.make(
-        totp.provisioning_uri(name=user.email, issuer_name="Kombuchalyzer"),
-    )
-    img_byte_arr = io.BytesIO()
-    qr_code.save(stream=img_byte_arr, format="PNG")
-    img_byte_arr = img_byte_arr.getvalue()
+    if not user.totp_secret:
+        await user_crud.set_totp_secret_if_unset(user, pyotp.random_base32())
+
+    key = (user.totp_secret, user.email)
+    img_byte_arr = qr_code_cache.get(key)
+    if img_byte_arr is None:
+        totp = pyotp.TOTP(user.totp_secret)
+        img_byte_arr = await run_in_threadpool(
+            render_qr_code, totp.provisioning_uri(name=user.email, issuer_name="Kombuchalyzer"),
+        )
+        qr_code_cache.set(key, img_byte_arr)
+
     return Response(content=img_byte_arr, media_type="image/png")
 
 
@@ -41,9 +56,12 @@ async def generate_qr_code(
 async def enable_totp(
     otp: OTPSubmission,
     user_crud: Annotated[UserCRUD, Depends(UserCRUD)],
-    user: Annotated[UserSchema, Depends(get_current_user)],
+    user: Annotated[UserSchema, Depends(get_current_user_uncached)],
 ) -> Response:
     """Validate QR code for TOTP."""
+    if not user.totp_secret:
+        return Response(status_code=400, content="TOTP has not been set up for this user.")
+
     totp = pyotp.TOTP(user.totp_secret).now()
     if totp != otp.code:
         return Response(status_code=401)
@@ -56,9 +74,12 @@ async def enable_totp(
 async def disable_totp(
     otp: OTPSubmission,
     user_crud: Annotated[UserCRUD, Depends(UserCRUD)],
-    user: Annotated[UserSchema, Depends(get_current_user)],
+    user: Annotated[UserSchema, Depends(get_current_user_uncached)],
 ) -> Response:
     """Validate QR code for TOTP."""
+    if not user.totp_secret:
+        return Response(status_code=400, content="TOTP has not been set up for this user.")
+
     totp = pyotp.TOTP(user.totp_secret).now()
     if totp != otp.code:
         return Response(status_code=401)
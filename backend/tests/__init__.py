@@ -0,0 +1 @@
+"""Kombuchalyzer backend tests."""
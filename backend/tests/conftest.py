@@ -0,0 +1,17 @@
+"""Test configuration.
+
+Settings are read when kbalyzer is imported, so required settings get placeholder values here.
+Tests never connect to Postgres; database tests use SQLite engines of their own.
+"""
+import os
+
+for _name, _value in {
+    "SECRET_KEY": "test-secret-key-that-is-long-enough",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_USER": "kbalyzer",
+    "POSTGRES_PASSWORD": "kbalyzer",
+    "POSTGRES_DB": "kbalyzer",
+    "FIRST_SUPERUSER_EMAIL": "admin@example.com",
+    "FIRST_SUPERUSER_PASSWORD": "admin",
+}.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,74 @@
+"""Tests of vectorized brew analytics."""
+import numpy as np
+
+from kbalyzer.db.crud.analytics import ABV_FACTOR, SECONDS_PER_DAY, analyze_readings, concatenate_readings
+
+TARGET_PH = 3.0
+CURVE_POINTS = 4
+
+
+def test_concatenate_readings() -> None:
+    lengths, readings = concatenate_readings([
+        ([0.0, 60.0], [3.5, None], [None, 1.05]),
+        ([], [], []),
+        ([30.0], [2.9], [1.01]),
+    ])
+
+    assert lengths.tolist() == [2, 0, 1]
+    np.testing.assert_array_equal(readings, [[0, 60, 30], [3.5, np.nan, 2.9], [np.nan, 1.05, 1.01]])
+
+
+def test_concatenate_readings_of_no_brews() -> None:
+    lengths, readings = concatenate_readings([])
+
+    assert lengths.shape == (0,)
+    assert readings.shape == (3, 0)
+    assert analyze_readings(lengths, readings, TARGET_PH, CURVE_POINTS)["rate_curve"].shape == (0, CURVE_POINTS)
+
+
+def _analyze_brew(times: np.ndarray, ph: np.ndarray, gravity: np.ndarray) -> dict[str, float | list[float]]:
+    """Analyze the readings of a single brew reading by reading."""
+    measured = ~np.isnan(gravity)
+    times_measured, gravity_measured = times[measured], gravity[measured]
+    done = np.flatnonzero(ph <= TARGET_PH)
+    result: dict[str, float | list[float]] = {
+        "abv": np.nan, "fermentation_rate": np.nan, "rate_curve": [np.nan] * CURVE_POINTS,
+        "hours_to_target_ph": (times[done[0]] - times[0]) / 3600 if len(done) else np.nan,
+    }
+    if not len(gravity_measured):
+        return result
+
+    drop = gravity_measured[0] - gravity_measured[-1]
+    span = times_measured[-1] - times_measured[0]
+    result["abv"] = drop * ABV_FACTOR
+    if span > 0:
+        result["fermentation_rate"] = drop / (span / SECONDS_PER_DAY)
+
+    slot_drop, slot_days = [0.0] * CURVE_POINTS, [0.0] * CURVE_POINTS
+    for i in range(len(times_measured) - 1):
+        middle = (times_measured[i] + times_measured[i + 1]) / 2
+        slot = min(int((middle - times_measured[0]) / span * CURVE_POINTS), CURVE_POINTS - 1)
+        slot_drop[slot] += gravity_measured[i] - gravity_measured[i + 1]
+        slot_days[slot] += (times_measured[i + 1] - times_measured[i]) / SECONDS_PER_DAY
+    result["rate_curve"] = [d / days if days else np.nan for d, days in zip(slot_drop, slot_days, strict=True)]
+    return result
+
+
+def test_analyze_readings_matches_per_brew_analysis() -> None:
+    rng = np.random.default_rng(0)
+    lengths = np.array([0, 5, 1, 300, 7])
+    count = lengths.sum()
+    brew = np.repeat(np.arange(len(lengths)), lengths)
+    times = np.concatenate([np.sort(rng.choice(10**7, length, replace=False)).astype(float) for length in lengths])
+    ph = rng.uniform(2.5, 4, count)
+    ph[rng.random(count) < 0.3] = np.nan
+    gravity = rng.uniform(1.0, 1.06, count)
+    gravity[rng.random(count) < 0.3] = np.nan
+    gravity[brew == 4] = np.nan
+
+    results = analyze_readings(lengths, np.array([times, ph, gravity]), TARGET_PH, CURVE_POINTS)
+
+    for index in range(len(lengths)):
+        expected = _analyze_brew(times[brew == index], ph[brew == index], gravity[brew == index])
+        for metric, value in expected.items():
+            np.testing.assert_allclose(results[metric][index], value, err_msg=f"{metric} of brew {index}")
@@ -0,0 +1,105 @@
+"""Tests of password hashing helpers, user creation and token authentication."""
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from kbalyzer.auth import PasswordWorkerPool, create_access_token
+from kbalyzer.db.crud import user as user_crud
+from kbalyzer.db.postgres import Base
+from kbalyzer.db.schemas.user import UserSchema
+from kbalyzer.models.user import UserCreate
+
+
+def test_map_runs_jobs_in_order() -> None:
+    pool = PasswordWorkerPool(max_workers=2, max_pending=4)
+    try:
+        assert asyncio.run(pool.map(str.upper, ["a", "b", "c"])) == ["A", "B", "C"]
+    finally:
+        pool.shutdown()
+
+
+def test_map_stops_remaining_jobs_when_pool_is_saturated() -> None:
+    pool = PasswordWorkerPool(max_workers=2, max_pending=3)
+    calls = []
+
+    def hash_slowly(item: int) -> int:
+        calls.append(item)
+        time.sleep(0.05)
+        return item
+
+    async def map_during_logins() -> None:
+        pool.pending += 1
+        mapping = asyncio.create_task(pool.map(hash_slowly, range(20)))
+        await asyncio.sleep(0.01)
+        # Another login takes the slot the third job needs, so it is rejected.
+        pool.pending += 1
+        with pytest.raises(HTTPException) as error:
+            await mapping
+        assert error.value.status_code == 503
+
+        # With the logins done, nothing may pick up the jobs of the failed call.
+        pool.pending -= 2
+        await asyncio.sleep(0.3)
+
+    try:
+        asyncio.run(map_during_logins())
+    finally:
+        pool.shutdown()
+
+    # Only jobs already handed to the pool when the call failed have run.
+    assert len(calls) <= pool.max_workers + 1
+
+
+def test_create_existing_user_skips_password_hash(monkeypatch: pytest.MonkeyPatch) -> None:
+    hashed = []
+
+    async def hash_password(password: str) -> str:
+        hashed.append(password)
+        return password
+
+    monkeypatch.setattr(user_crud, "get_password_hash_async", hash_password)
+
+    async def create_twice() -> None:
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            async with AsyncSession(engine) as db:
+                db.add(UserSchema(email="brewer@example.com", hashed_password="hash"))  # noqa: S106
+                await db.commit()
+
+                with pytest.raises(ValueError, match="already exists"):
+                    await user_crud.UserCRUD(db).create_user(
+                        UserCreate(email="brewer@example.com", password="secret"),  # noqa: S106
+                    )
+        finally:
+            await engine.dispose()
+
+    asyncio.run(create_twice())
+    assert hashed == []
+
+
+@pytest.mark.parametrize("with_claims", [True, False])
+def test_token_principal_lookup_releases_connection(with_claims: bool) -> None:  # noqa: FBT001
+    async def authenticate() -> tuple[str, bool]:
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                user = UserSchema(email="brewer@example.com", hashed_password="hash", role="admin")  # noqa: S106
+                db.add(user)
+                await db.commit()
+                claims = user_crud.access_token_claims(user) if with_claims else None
+                token = create_access_token(subject=user.email, claims=claims)
+
+                principal = await user_crud.get_token_principal(user_crud.UserCRUD(db), token)
+                # Routes reading from a replica must not keep the primary connection checked out.
+                return principal.email, db.in_transaction()
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(authenticate()) == ("brewer@example.com", False)
@@ -0,0 +1,74 @@
+"""Tests of brew models and stats caching."""
+import asyncio
+from datetime import UTC, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from kbalyzer.db.crud.brews import BrewCRUD, brew_stats_cache
+from kbalyzer.db.notify import BREW_READINGS_CHANNEL, change_listener
+from kbalyzer.db.postgres import Base
+from kbalyzer.db.schemas.brews import Brew, BrewRollup
+from kbalyzer.models.brews import ReadingBatch
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def test_reading_timestamps_are_normalized_to_utc() -> None:
+    batch = ReadingBatch.model_validate({"readings": [
+        {"recorded_at": "2026-01-01T12:00:00"},
+        {"recorded_at": "2026-01-01T12:30:00+02:00"},
+        {"recorded_at": datetime(2026, 1, 1, 9, tzinfo=timezone(timedelta(hours=-5)))},
+    ]})
+
+    assert [reading.recorded_at for reading in batch.readings] == [
+        datetime(2026, 1, 1, 12, tzinfo=UTC),
+        datetime(2026, 1, 1, 10, 30, tzinfo=UTC),
+        datetime(2026, 1, 1, 14, tzinfo=UTC),
+    ]
+    assert all(reading.recorded_at.tzinfo is UTC for reading in batch.readings)
+    # Batches mixing naive and aware timestamps can be ordered.
+    assert max(batch.readings, key=lambda reading: reading.recorded_at) is batch.readings[2]
+
+
+def test_brew_stats_are_cached_per_brew(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(change_listener, "connected", True)
+    brew_stats_cache.clear()
+
+    async def stats() -> list[tuple[dict[str, int], int]]:
+        """Get reading counts by brew name and the number of queries run, before and after new readings."""
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        queries: list[str] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+        try:
+            async with AsyncSession(engine) as db:
+                brews = [Brew(name="measured"), Brew(name="idle")]
+                db.add_all(brews)
+                await db.flush()
+                names = {brew.id: brew.name for brew in brews}
+                measured_id = brews[0].id
+                db.add(BrewRollup(brew_id=measured_id, reading_count=10, first_recorded_at=START))
+                await db.commit()
+
+                results = []
+                for readings_added in (False, False, True):
+                    if readings_added:
+                        await db.execute(update(BrewRollup).values(reading_count=11))
+                        await db.commit()
+                        change_listener._run_callbacks(BREW_READINGS_CHANNEL, str(measured_id))  # noqa: SLF001
+                    queries.clear()
+                    brew_stats = await BrewCRUD(db).get_brew_stats(list(names))
+                    results.append((
+                        {names[brew_id]: stats.reading_count for brew_id, stats in brew_stats.items()},
+                        len(queries),
+                    ))
+                return results
+        finally:
+            await engine.dispose()
+            brew_stats_cache.clear()
+
+    # Brews without readings have no stats, and are not looked up again while cached either.
+    assert asyncio.run(stats()) == [({"measured": 10}, 1), ({"measured": 10}, 0), ({"measured": 11}, 1)]
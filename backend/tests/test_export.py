@@ -0,0 +1,147 @@
+"""Tests of streamed brew and reading exports."""
+import asyncio
+import tracemalloc
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from starlette.types import Message
+
+from kbalyzer.db.crud.brews import EXPORT_BATCH_SIZE, BrewCRUD
+from kbalyzer.db.crud.user import get_token_admin_user
+from kbalyzer.db.postgres import Base, get_read_db
+from kbalyzer.db.schemas.brews import Brew, BrewReading
+from kbalyzer.main import app
+from kbalyzer.models.auth import TokenPrincipal
+from kbalyzer.models.brews import ExportFormat
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def test_stream_readings_yields_bounded_batches() -> None:
+    async def stream() -> list[int]:
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            async with AsyncSession(engine) as db:
+                brew = Brew(name="export")
+                db.add(brew)
+                await db.flush()
+                brew_id = brew.id
+                db.add_all(
+                    BrewReading(brew_id=brew_id, recorded_at=START + timedelta(seconds=i), gravity=1.01)
+                    for i in range(2 * EXPORT_BATCH_SIZE + 10)
+                )
+                await db.commit()
+
+                return [len(partition) async for partition in BrewCRUD(db).stream_readings(brew_id)]
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(stream()) == [EXPORT_BATCH_SIZE, EXPORT_BATCH_SIZE, 10]
+
+
+async def _add_brew(engine: AsyncEngine, name: str, readings: int) -> UUID:
+    async with AsyncSession(engine) as db:
+        brew = Brew(name=name)
+        db.add(brew)
+        await db.flush()
+        brew_id = brew.id
+        await db.execute(insert(BrewReading), [
+            {"brew_id": brew_id, "recorded_at": START + timedelta(seconds=i), "temperature": 22.5, "gravity": 1.01}
+            for i in range(readings)
+        ])
+        await db.commit()
+        return brew_id
+
+
+async def _request_export(query: str) -> tuple[int, int]:
+    """Run an export request through the app, counting and discarding the body as it is sent.
+
+    Test clients buffer the whole body, so the app is called directly to see what it holds itself.
+    """
+    status, size = 0, 0
+    requested = False
+
+    async def receive() -> Message:
+        nonlocal requested
+        if requested:
+            # The client stays connected, the app stops waiting for a disconnect once the body is sent.
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app({
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/brews/export",
+        "raw_path": b"/api/brews/export",
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }, receive, send)
+    return status, size
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export_endpoint_memory_does_not_grow_with_export_size(
+    fmt: ExportFormat, tmp_path: Path, monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+
+    async def read_db() -> AsyncIterator[AsyncSession]:
+        async with AsyncSession(engine) as db:
+            yield db
+
+    def admin_user() -> TokenPrincipal:
+        return TokenPrincipal.model_construct(role="admin")
+
+    monkeypatch.setitem(app.dependency_overrides, get_read_db, read_db)
+    monkeypatch.setitem(app.dependency_overrides, get_token_admin_user, admin_user)
+
+    async def export() -> list[tuple[int, int, int]]:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        try:
+            brew_ids = [
+                await _add_brew(engine, "small", 4 * EXPORT_BATCH_SIZE),
+                await _add_brew(engine, "large", 40 * EXPORT_BATCH_SIZE),
+            ]
+            await _request_export(f"resource=readings&format={fmt}&brew_id={brew_ids[0]}")  # Warm up
+            results = []
+            tracemalloc.start()
+            try:
+                for brew_id in brew_ids:
+                    tracemalloc.reset_peak()
+                    status, size = await _request_export(f"resource=readings&format={fmt}&brew_id={brew_id}")
+                    results.append((status, size, tracemalloc.get_traced_memory()[1]))
+            finally:
+                tracemalloc.stop()
+            return results
+        finally:
+            await engine.dispose()
+
+    (small_status, small_size, small_peak), (large_status, large_size, large_peak) = asyncio.run(export())
+
+    assert small_status == large_status == 200
+    assert large_size > 9 * small_size
+    # Route, streaming response and server side cursor only hold about one batch at a time.
+    assert large_peak < 1.5 * small_peak
+    assert large_peak < large_size / 2
@@ -0,0 +1,61 @@
+"""Tests of login rate limiting."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+
+from kbalyzer.ratelimit import MemoryRateLimitStore, RateLimiter, client_ip
+from kbalyzer.settings import settings
+
+PROXY = "10.0.0.2"
+CLIENT = "203.0.113.7"
+
+
+def _request(*forwarded_for: str) -> Request:
+    """Build a request reaching the app through a proxy, with the given X-Forwarded-For headers."""
+    return Request({
+        "type": "http",
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded_for],
+        "client": (PROXY, 40000),
+    })
+
+
+@pytest.fixture
+def trust_forwarded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_FORWARDED_HOPS", 1)
+
+
+def test_forwarded_for_is_ignored_unless_trusted() -> None:
+    assert client_ip(_request(CLIENT)) == PROXY
+
+
+@pytest.mark.usefixtures("trust_forwarded")
+def test_spoofed_forwarded_for_does_not_change_client_ip() -> None:
+    # The proxy appends the address it saw to whatever the client sent.
+    assert client_ip(_request(CLIENT)) == CLIENT
+    assert client_ip(_request(f"198.51.100.1, {CLIENT}")) == CLIENT
+    assert client_ip(_request("198.51.100.1", CLIENT)) == CLIENT
+
+
+@pytest.mark.usefixtures("trust_forwarded")
+def test_forwarded_for_hops(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_FORWARDED_HOPS", 2)
+
+    assert client_ip(_request(f"198.51.100.1, {CLIENT}, 10.0.0.1")) == CLIENT
+    # Fewer entries than trusted proxies means the header did not pass through all of them.
+    assert client_ip(_request(CLIENT)) == PROXY
+
+
+@pytest.mark.usefixtures("trust_forwarded")
+def test_spoofed_forwarded_for_cannot_escape_limit() -> None:
+    limiter = RateLimiter(MemoryRateLimitStore(max_keys=100), "login-ip", per_minute=1, burst=3)
+
+    async def attempt(spoofed: int) -> None:
+        await limiter.hit(client_ip(_request(f"198.51.100.{spoofed}, {CLIENT}")))
+
+    for spoofed in range(3):
+        asyncio.run(attempt(spoofed))
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(attempt(3))
+    assert error.value.status_code == 429
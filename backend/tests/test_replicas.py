@@ -0,0 +1,127 @@
+"""Tests of read replica routing, with SQLite databases standing in for Postgres."""
+import asyncio
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from kbalyzer.db import postgres
+from kbalyzer.db.postgres import ReplicaRouter, open_read_session
+
+RETRY_SECONDS = 30.0
+
+
+class Clock:
+    """Controllable stand-in for `time.monotonic`."""
+
+    def __init__(self) -> None:
+        """Initialize class."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(postgres, "monotonic", clock)
+    return clock
+
+
+def _engine(path: Path) -> AsyncEngine:
+    return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+
+@pytest.fixture
+def databases(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[dict[str, AsyncEngine]]:
+    """Primary, two reachable replicas and one replica that cannot be connected to."""
+    engines = {
+        "primary": _engine(tmp_path / "primary.db"),
+        "replica1": _engine(tmp_path / "replica1.db"),
+        "replica2": _engine(tmp_path / "replica2.db"),
+        "broken": _engine(tmp_path / "missing" / "replica.db"),
+    }
+    monkeypatch.setattr(
+        postgres, "AsyncSessionLocal", async_sessionmaker(bind=engines["primary"], expire_on_commit=False),
+    )
+    yield engines
+    for engine in engines.values():
+        asyncio.run(engine.dispose())
+
+
+def _use_replicas(monkeypatch: pytest.MonkeyPatch, *replicas: AsyncEngine) -> ReplicaRouter:
+    router = ReplicaRouter(list(replicas), RETRY_SECONDS)
+    monkeypatch.setattr(postgres, "replica_router", router)
+    return router
+
+
+def _served_by(engines: dict[str, AsyncEngine]) -> str:
+    """Open a read session, run a query on it and get the name of the database that served it."""
+    async def read() -> str:
+        db = await open_read_session()
+        try:
+            await db.execute(text("SELECT 1"))
+            return next(name for name, engine in engines.items() if db.bind is engine)
+        finally:
+            await db.close()
+
+    return asyncio.run(read())
+
+
+def test_candidates_rotate_round_robin() -> None:
+    a, b, c = (_engine(Path(f"{name}.db")) for name in "abc")
+    router = ReplicaRouter([a, b, c], RETRY_SECONDS)
+
+    assert [router.candidates() for _ in range(4)] == [[a, b, c], [b, c, a], [c, a, b], [a, b, c]]
+
+
+def test_no_replicas_gives_no_candidates() -> None:
+    assert ReplicaRouter([], RETRY_SECONDS).candidates() == []
+
+
+def test_mark_down_skips_replica_for_retry_period(clock: Clock) -> None:
+    a, b = (_engine(Path(f"{name}.db")) for name in "ab")
+    router = ReplicaRouter([a, b], RETRY_SECONDS)
+
+    router.mark_down(a)
+    assert router.candidates() == [b]
+    clock.now += RETRY_SECONDS - 1
+    assert router.candidates() == [b]
+    clock.now += 1
+    assert router.candidates() == [a, b]
+
+
+def test_read_sessions_alternate_between_replicas(
+    databases: dict[str, AsyncEngine], monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _use_replicas(monkeypatch, databases["replica1"], databases["replica2"])
+
+    assert [_served_by(databases) for _ in range(3)] == ["replica1", "replica2", "replica1"]
+
+
+def test_unreachable_replica_is_skipped_until_retry(
+    clock: Clock, databases: dict[str, AsyncEngine], monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    router = _use_replicas(monkeypatch, databases["broken"], databases["replica1"])
+
+    assert _served_by(databases) == "replica1"
+    # The broken replica is now skipped without trying to connect to it.
+    assert router.candidates() == [databases["replica1"]]
+    assert _served_by(databases) == "replica1"
+
+    clock.now += RETRY_SECONDS
+    assert databases["broken"] in router.candidates()
+
+
+def test_falls_back_to_primary_without_reachable_replica(
+    databases: dict[str, AsyncEngine], monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _use_replicas(monkeypatch, databases["broken"])
+    assert _served_by(databases) == "primary"
+
+    _use_replicas(monkeypatch)
+    assert _served_by(databases) == "primary"